@@ -0,0 +1 @@
+"""Benchmarks of the nefiteasy integration."""
@@ -0,0 +1,64 @@
+"""Helpers shared by the benchmarks."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable, Container
+from contextlib import asynccontextmanager
+import tempfile
+from typing import Any
+from unittest.mock import patch
+
+from aionefit import NefitCore
+from homeassistant.core import HomeAssistant
+
+from custom_components.nefiteasy import NefitEasy
+from custom_components.nefiteasy.const import NUMBERS, SELECTS, SENSORS, SWITCHES
+from custom_components.nefiteasy.models import (
+    NefitEntityDescription,
+    NefitSensorEntityDescription,
+)
+
+DESCRIPTIONS: tuple[NefitEntityDescription, ...] = (
+    *SENSORS,
+    *SWITCHES,
+    *SELECTS,
+    *NUMBERS,
+)
+
+
+def config(serial: str = "123456789") -> dict[str, Any]:
+    """Return the configuration of a thermostat."""
+    return {"serial": serial, "accesskey": "accesskey", "password": "password"}
+
+
+@asynccontextmanager
+async def async_hass(factory: Callable[..., NefitCore]) -> AsyncIterator[HomeAssistant]:
+    """Return an instance that connects thermostats with the factory."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        with patch("custom_components.nefiteasy.NefitCore", factory):
+            yield HomeAssistant(config_dir)
+
+
+async def async_coordinator(
+    hass: HomeAssistant,
+    serial: str = "123456789",
+    extra: int = 0,
+    endpoints: Container[str] | None = None,
+) -> NefitEasy:
+    """Return a coordinator with the endpoints of all entities registered.
+
+    If endpoints is given, only the entities of those endpoints are added.
+    Extra endpoints are registered on top of them, to measure how costs grow
+    with the number of endpoints.
+    """
+    coordinator = NefitEasy(hass, config(serial))
+    for description in DESCRIPTIONS:
+        if endpoints is None or description.url is None or description.url in endpoints:
+            await coordinator.add_key(description)
+    for index in range(extra):
+        await coordinator.add_key(
+            NefitSensorEntityDescription(
+                key=f"extra{index}", url=f"/extra/endpoint{index}"
+            )
+        )
+
+    return coordinator
@@ -0,0 +1,214 @@
+"""Benchmark of the coordinator against simulated thermostats.
+
+Measures the time from start to the first full state, the wall time of a
+refresh cycle, the throughput of parse_message, the cost of updating the
+entities and the memory used per thermostat. The results are written as
+JSON, to compare runs and catch regressions.
+
+    python -m benchmarks.coordinator --latency 0.05 --jitter 0.02 --output run.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nefiteasy import NefitEasy
+from custom_components.nefiteasy.const import STATE_CONNECTION_VERIFIED
+
+from .common import DESCRIPTIONS, async_coordinator, async_hass
+from .device import FIXTURE, DeviceProfile, FakeNefitCore
+
+FIXTURE_DATA: dict[str, Any] = json.loads(FIXTURE.read_text())
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    """Return the statistics of timing samples, in seconds."""
+    ordered = sorted(samples)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+async def _async_start(hass: HomeAssistant, serial: str) -> tuple[NefitEasy, float]:
+    """Start a coordinator, return it and the seconds to its first state.
+
+    Only entities of endpoints the simulated device knows are added, a real
+    device does not answer requests of unknown endpoints either.
+    """
+    start = time.perf_counter()
+    coordinator = await async_coordinator(hass, serial, endpoints=FIXTURE_DATA)
+    await coordinator.connect()
+    if coordinator.connected_state != STATE_CONNECTION_VERIFIED:
+        raise RuntimeError(f"Simulated thermostat {serial} did not connect")
+    await coordinator.async_refresh()
+    return coordinator, time.perf_counter() - start
+
+
+async def _async_refresh_cycles(coordinator: NefitEasy, cycles: int) -> dict[str, Any]:
+    """Measure full refresh cycles, with every endpoint due."""
+    client: FakeNefitCore = coordinator.nefit  # type: ignore[assignment]
+    requests, dropped = client.requests, client.dropped
+
+    samples = []
+    for _ in range(cycles):
+        coordinator._fetched.clear()
+        start = time.perf_counter()
+        await coordinator._async_update_data()
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "seconds": _summary(samples),
+        "requests_per_cycle": (client.requests - requests) / cycles,
+        "dropped": client.dropped - dropped,
+    }
+
+
+async def _async_parse_message(coordinator: NefitEasy, messages: int) -> dict[str, Any]:
+    """Measure the throughput of incoming messages."""
+    client: FakeNefitCore = coordinator.nefit  # type: ignore[assignment]
+    mix = list(client.data.values())
+
+    start = time.perf_counter()
+    for index in range(messages):
+        await coordinator.parse_message(mix[index % len(mix)])
+    elapsed = time.perf_counter() - start
+
+    return {"messages_per_second": messages / elapsed}
+
+
+def _fan_out(coordinator: NefitEasy, updates: int) -> dict[str, Any]:
+    """Measure an update of the entities after a single value changed.
+
+    Every listener stands for an entity that only writes its state when one
+    of its keys changed, like NefitCoordinatorEntity does.
+    """
+    writes = 0
+
+    def listener(keys: frozenset[str]) -> None:
+        nonlocal writes
+        if coordinator.has_changed(keys):
+            writes += 1
+
+    removers = [
+        coordinator.async_add_listener(
+            lambda keys=frozenset((description.key,)): listener(keys)
+        )
+        for description in DESCRIPTIONS
+    ]
+
+    start = time.perf_counter()
+    for index in range(updates):
+        coordinator._set("system_pressure", index)
+        coordinator.async_update_listeners()
+    elapsed = time.perf_counter() - start
+
+    for remove in removers:
+        remove()
+
+    return {
+        "listeners": len(removers),
+        "seconds_per_update": elapsed / updates,
+        "writes_per_update": writes / updates,
+    }
+
+
+async def _async_memory(factory: Any, thermostats: int) -> dict[str, Any]:
+    """Measure the memory allocated per started thermostat."""
+    async with async_hass(factory) as hass:
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        coordinators = [
+            coordinator
+            for coordinator, _ in await asyncio.gather(
+                *(_async_start(hass, f"{index:09d}") for index in range(thermostats))
+            )
+        ]
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        allocated = sum(
+            stat.size_diff for stat in snapshot.compare_to(baseline, "filename")
+        )
+        for coordinator in coordinators:
+            await coordinator.shutdown("benchmark")
+
+    return {"bytes_per_thermostat": allocated / thermostats}
+
+
+async def _async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmarks."""
+    profile = DeviceProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        push_interval=args.push_interval,
+        connect_latency=args.connect_latency,
+        seed=args.seed,
+    )
+    factory = FakeNefitCore.factory(profile, FIXTURE_DATA)
+
+    results: dict[str, Any] = {}
+    async with async_hass(factory) as hass:
+        started = await asyncio.gather(
+            *(_async_start(hass, f"{index:09d}") for index in range(args.thermostats))
+        )
+        results["startup_to_first_state"] = _summary([s for _, s in started])
+
+        coordinator = started[0][0]
+        results["refresh_cycle"] = await _async_refresh_cycles(coordinator, args.cycles)
+        results["parse_message"] = await _async_parse_message(
+            coordinator, args.messages
+        )
+        results["fan_out"] = _fan_out(coordinator, args.updates)
+
+        for coordinator, _ in started:
+            await coordinator.shutdown("benchmark")
+
+    results["memory"] = await _async_memory(factory, args.thermostats)
+
+    return {
+        "profile": asdict(profile),
+        "thermostats": args.thermostats,
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Parse the arguments, run the benchmarks and write the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--thermostats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--push-interval", type=float, default=None)
+    parser.add_argument("--connect-latency", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--updates", type=int, default=10_000)
+    parser.add_argument("--output", help="file to write the results to")
+    args = parser.parse_args()
+
+    results = asyncio.run(_async_run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
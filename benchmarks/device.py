@@ -0,0 +1,142 @@
+"""A simulated thermostat that stands in for NefitCore."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import copy
+from dataclasses import dataclass
+from functools import partial
+import json
+from pathlib import Path
+import random
+from types import SimpleNamespace
+from typing import Any
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "nefit_data.json"
+
+
+@dataclass
+class DeviceProfile:
+    """Behaviour of the simulated device and the connection to it."""
+
+    latency: float = 0.05  # seconds until a request is answered
+    jitter: float = 0.0  # maximum deviation of the latency, in seconds
+    drop_rate: float = 0.0  # share of requests that are never answered
+    push_interval: float | None = None  # seconds between unsolicited messages
+    connect_latency: float = 0.1  # seconds until a session is connected
+    seed: int | None = None
+
+
+class FakeNefitCore:
+    """A client of a simulated device, with the interface of NefitCore.
+
+    The device answers from the test fixture after the latency of its
+    profile, and drops and pushes messages as configured.
+    """
+
+    def __init__(
+        self,
+        profile: DeviceProfile,
+        data: dict[str, Any],
+        serial_number: str,
+        access_key: str,
+        password: str,
+        message_callback: Callable[[dict[str, Any]], Any],
+    ) -> None:
+        """Initialize the client."""
+        self.profile = profile
+        self.data = copy.deepcopy(data)
+        self.serial_number = serial_number
+        self.message_callback = message_callback
+        self.failed_auth_handler: Callable[..., Any] | None = None
+        self.no_content_callback: Callable[..., Any] | None = None
+        self.session_end_callback: Callable[..., Any] | None = None
+        self.xmppclient = SimpleNamespace(
+            connected_event=asyncio.Event(), message_event=asyncio.Event()
+        )
+
+        self._random = random.Random(profile.seed)
+        self._push_task: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+        self.requests = 0
+        self.dropped = 0
+        self.pushed = 0
+
+    @classmethod
+    def factory(
+        cls, profile: DeviceProfile, data: dict[str, Any] | None = None
+    ) -> Callable[..., FakeNefitCore]:
+        """Return a factory of clients that connect to the device."""
+        if data is None:
+            data = json.loads(FIXTURE.read_text())
+        return partial(cls, profile, data)
+
+    async def connect(self) -> None:
+        """Connect to the device."""
+        asyncio.get_running_loop().call_later(
+            self.profile.connect_latency, self._connected
+        )
+
+    def _connected(self) -> None:
+        """Finish connecting and start pushing messages."""
+        self.xmppclient.connected_event.set()
+        if self.profile.push_interval and self._push_task is None:
+            self._push_task = asyncio.create_task(self._push())
+
+    async def disconnect(self) -> None:
+        """Disconnect from the device."""
+        if self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
+        for task in self._tasks:
+            task.cancel()
+
+    def get(self, path: str) -> None:
+        """Request an endpoint, it is answered after a delay or dropped."""
+        self.requests += 1
+        if self._random.random() < self.profile.drop_rate:
+            self.dropped += 1
+            return
+
+        asyncio.get_running_loop().call_later(self._delay(), self._reply, path)
+
+    def put_value(self, path: str, value: Any) -> None:
+        """Write the value of an endpoint."""
+        if path in self.data:
+            self.data[path]["value"] = value
+
+    def set_usermode(self, mode: str) -> None:
+        """Set the user mode."""
+        self.data["/ecus/rrc/uiStatus"]["value"]["UMD"] = mode
+
+    def set_temperature(self, temperature: float) -> None:
+        """Set the temperature setpoint."""
+        self.data["/ecus/rrc/uiStatus"]["value"]["TSP"] = str(temperature)
+
+    def _delay(self) -> float:
+        """Return the latency of a reply."""
+        jitter = self.profile.jitter
+        return max(0.0, self.profile.latency + self._random.uniform(-jitter, jitter))
+
+    def _reply(self, path: str) -> None:
+        """Send the reply to a request."""
+        self.xmppclient.message_event.set()
+        if path in self.data:
+            self._send(self.data[path])
+
+    def _send(self, message: dict[str, Any]) -> None:
+        """Pass a message to the client callback."""
+        task = asyncio.create_task(self.message_callback(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _push(self) -> None:
+        """Send unsolicited messages of random endpoints."""
+        assert self.profile.push_interval is not None
+        # directories of the endpoint tree are not pushed
+        paths = [path for path, message in self.data.items() if "value" in message]
+        while True:
+            await asyncio.sleep(self.profile.push_interval)
+            self.pushed += 1
+            self._send(self.data[self._random.choice(paths)])
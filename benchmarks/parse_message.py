@@ -0,0 +1,81 @@
+"""Micro-benchmark of routing incoming messages.
+
+Measures the time parse_message takes per message for the kinds of
+messages the device sends, with the entity descriptions of the integration
+and with many more endpoints registered.
+
+    python -m benchmarks.parse_message
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.nefiteasy.const import STATE_CONNECTION_VERIFIED
+
+from .common import async_coordinator, async_hass
+
+MESSAGES: dict[str, dict[str, Any]] = {
+    "uiStatus": {
+        "id": "/ecus/rrc/uiStatus",
+        "value": {
+            "TSP": "20.0",
+            "IHT": "17.50",
+            "UMD": "clock",
+            "BAI": "CH",
+            "CTD": "2021-12-28T21:43:25+00:00 Tu",
+            "DHW": "on",
+            "HMD": "off",
+            "FPA": "off",
+        },
+    },
+    "endpoint": {"id": "/system/appliance/systemPressure", "value": 1.8},
+    "presence": {
+        "id": "/ecus/rrc/homeentrancedetection/userprofile1/detected",
+        "value": "on",
+    },
+    "unknown": {"id": "/gateway/brandID", "value": "Nefit"},
+}
+
+
+async def _async_run(iterations: int, extras: list[int]) -> None:
+    """Run the benchmark."""
+    # the coordinators do not connect, their clients are never used
+    async with async_hass(lambda **kwargs: MagicMock(disconnect=AsyncMock())) as hass:
+        print(f"{'endpoints':>10} {'message':>10} {'us/msg':>8}")
+        for extra in extras:
+            coordinator = await async_coordinator(hass, extra=extra)
+            coordinator.connected_state = STATE_CONNECTION_VERIFIED
+            for name, message in MESSAGES.items():
+                await coordinator.parse_message(message)  # warm up
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    await coordinator.parse_message(message)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{len(coordinator._urls):>10} {name:>10}"
+                    f" {elapsed / iterations * 1e6:>8.2f}"
+                )
+            await coordinator.shutdown("benchmark")
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument(
+        "--extra",
+        type=int,
+        nargs="+",
+        default=[0, 100, 1000],
+        help="numbers of additional endpoints to register",
+    )
+    args = parser.parse_args()
+    asyncio.run(_async_run(args.iterations, args.extra))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,73 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime
+from functools import partial
 import logging
-import re
+import random
+import time
 from typing import Any
 
 from aionefit import NefitCore
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 import slixmpp
 
+from .breaker import EndpointBreakers
+from .capabilities import Capabilities, async_probe
+from .connection import async_get_handshakes
 from .const import (
+    BOILER_ACTIVE,
+    CIRCUIT,
     CONF_ACCESSKEY,
+    CONF_MAX_IN_FLIGHT,
+    CONF_NAME,
     CONF_PASSWORD,
     CONF_SERIAL,
+    DEFAULT_CIRCUITS,
+    DEFAULT_MAX_IN_FLIGHT,
+    DISPATCH_COOLDOWN,
     DOMAIN,
+    FIRMWARE_URL,
+    NUMBERS,
+    PRESENCE_PREFIX,
+    PRESENCE_URL,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+    REFRESH_INTERVALS,
+    REFRESH_MARGIN,
+    SELECTS,
+    SENSORS,
+    SIGNAL_CAPABILITIES,
     STATE_CONNECTED,
     STATE_CONNECTION_VERIFIED,
     STATE_ERROR_AUTH,
     STATE_INIT,
+    STORAGE_DATA_INTERVAL,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    SWITCHES,
+    UI_STATUS_FIELDS,
+    UPDATE_INTERVAL_ACTIVE,
+    UPDATE_INTERVAL_IDLE,
+    WRITE_REFRESH_DELAY,
+    WRITE_SETTLE,
     short,
 )
-from .models import NefitEntityDescription
+from .models import NefitEntityDescription, NefitPriority, NefitRefresh
+from .pending import PendingRequests
+from .scheduler import RequestScheduler
+from .stats import NefitStats
+from .store import StateStore
+from .writes import PendingWrite, WriteQueue
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,28 +76,71 @@ _LOGGER = logging.getLogger(__name__)
 DOMAINS = ["climate", "select", "sensor", "switch", "number"]
 
 
+def _entity_urls() -> frozenset[str]:
+    """Return the endpoints of the entities and the circuits of templates."""
+    urls = {PRESENCE_URL}
+    for description in (*SENSORS, *SWITCHES, *NUMBERS, *SELECTS):
+        if description.url is not None:
+            urls.add(description.url)
+        if description.circuits is not None:
+            urls.add(f"{description.circuits}/{CIRCUIT}")
+    return frozenset(urls)
+
+
+# the device is probed for these endpoints
+ENTITY_URLS = _entity_urls()
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the nefiteasy component."""
     hass.data.setdefault(DOMAIN, {})
 
     hass.data[DOMAIN][entry.entry_id] = {}
 
-    credentials = dict(entry.data)
-    client = NefitEasy(hass, credentials)
+    client = NefitEasy(hass, {**entry.data, **entry.options})
 
-    await client.connect()
-    if client.connected_state == STATE_CONNECTION_VERIFIED:
-        hass.data[DOMAIN][entry.entry_id]["client"] = client
+    await client.async_load()
+    warm_start = client.restored
+    if warm_start:
+        # start with the last known state and connect in the background
+        client.async_connect_in_background()
     else:
-        raise ConfigEntryNotReady
+        await client.connect()
+        if client.connected_state != STATE_CONNECTION_VERIFIED:
+            raise ConfigEntryNotReady
+        # the platforms only create the entities the device has
+        await client.async_discover_capabilities()
+
+    hass.data[DOMAIN][entry.entry_id]["client"] = client
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, client.async_save_data)
+    )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, DOMAINS)
 
-    await client.async_refresh()
+    if not warm_start:
+        await client.async_refresh()
+
+    if "recorder" in hass.config.components:
+        # the history is imported as statistics, which requires the recorder
+        from .gas_usage import (  # pylint: disable=import-outside-toplevel
+            async_setup_gas_usage,
+        )
+
+        entry.async_on_unload(
+            async_setup_gas_usage(hass, client, entry.data[CONF_NAME])
+        )
 
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload nefit easy component."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, DOMAINS)
@@ -77,17 +162,34 @@ class NefitEasy(DataUpdateCoordinator):
         """Initialize nefit easy component."""
         _LOGGER.debug("Initialize Nefit class")
 
-        self._data: dict[str, Any] = {}  # stores device states and values
-        self._event = asyncio.Event()
+        self._state = StateStore()  # stores device states and values
+        self._notified = 0  # version of the state at the last update
+        # keys changed since the last update, while the listeners are updated
+        self._changed: frozenset[str] = frozenset()
+        self._cached_at: str | None = None
+        self._updated_at: datetime | None = None
+        self._saved_at: datetime | None = None
         self._lock = asyncio.Lock()
         self.hass = hass
         self.connected_state = STATE_INIT
         self.expected_end = False
         self.is_connecting = False
+        self.background_connect = False
+        self._verified = asyncio.Event()
+        self._reconnect_task: asyncio.Task[None] | None = None
         self.serial = config[CONF_SERIAL]
         self._config = config
-        self._request: str = ""
 
+        self._pending = PendingRequests()
+        self.stats = NefitStats()
+        self._writes = WriteQueue()
+        self._write_timer: asyncio.TimerHandle | None = None
+        self._refresh_timers: dict[str, asyncio.TimerHandle] = {}
+        self._scheduler = RequestScheduler(
+            config.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
+        )
+
+        self._handshakes = async_get_handshakes(hass)
         self.nefit = NefitCore(
             serial_number=config[CONF_SERIAL],
             access_key=config[CONF_ACCESSKEY],
@@ -100,27 +202,132 @@ class NefitEasy(DataUpdateCoordinator):
         self.nefit.session_end_callback = self.session_end_callback
 
         self._urls: dict[str, Any] = {}
-        self._status_keys: dict[str, Any] = {}
+        # uiStatus field and decoder per index of a key
+        self._status_keys: dict[int, tuple[str, Callable[[Any], Any] | None]] = {
+            self._state.index(key): (field, decode)
+            for field, (key, decode) in UI_STATUS_FIELDS.items()
+        }
+        self._decoders: dict[str, Callable[[Any], Any]] = {}  # per key
+        # uiStatus fields of endpoints that are read from uiStatus, and the
+        # fields uiStatus turned out not to have
+        self._bundled: set[str] = set()
+        self._unbundled: set[str] = set()
+        # handler of the value per message id, see _build_routes
+        self._routes: dict[str, Callable[[Any], Any]] = {}
+        self._build_routes()
+        self._fetched: dict[str, datetime] = {}  # last success per endpoint
+        self._failed: dict[str, float] = {}  # keys whose last refresh failed
+        self._breakers = EndpointBreakers()
+        # endpoints the device does not support, kept across restarts
+        self._unsupported: set[str] = set()
+        self._capabilities: Capabilities | None = None
 
-        update_interval = timedelta(seconds=60)
+        # device information that is kept across restarts
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{self.serial}"
+        )
+        self._stored: dict[str, Any] = {}
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=UPDATE_INTERVAL_IDLE,
+        )
+
+        # coalesces bursts of pushed messages into one update of the entities
+        self._dispatcher = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=DISPATCH_COOLDOWN,
+            immediate=True,
+            function=self.async_update_listeners,
         )
 
+    async def async_load(self) -> None:
+        """Load the stored device information and the last known state.
+
+        The entities show the last known state until it is refreshed.
+        """
+        self._stored = await self._store.async_load() or {}
+        self._unsupported = set(self._stored.get("unsupported", []))
+        if (capabilities := self._stored.get("capabilities")) is not None:
+            self._capabilities = Capabilities.from_dict(capabilities)
+
+        if data := self._stored.get("data"):
+            self._state.restore(data)
+            self._cached_at = self._stored.get("data_time")
+            self.data = self._state
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the device information and state to store."""
+        if self._updated_at is None:
+            return self._stored
+
+        return {
+            **self._stored,
+            "data": self._state.as_dict(),
+            "data_time": self._updated_at.isoformat(),
+        }
+
+    @callback
+    def _async_save(self) -> None:
+        """Save the device information after a delay."""
+        self._saved_at = dt_util.utcnow()
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    async def async_save_data(self, event: Event | None = None) -> None:
+        """Save the device information and state right away."""
+        self._saved_at = dt_util.utcnow()
+        await self._store.async_save(self._data_to_store())
+
+    @property
+    def restored(self) -> bool:
+        """Return whether the state is restored from the last run."""
+        return self._state.restored()
+
+    def cached_at(self, keys: Iterable[str]) -> str | None:
+        """Return when the restored state was saved if any key is restored."""
+        if not self._state.restored(keys):
+            return None
+
+        return self._cached_at
+
     async def add_key(self, entity_description: NefitEntityDescription) -> None:
         """Add key to list of endpoints."""
+        key = entity_description.data_key or entity_description.key
+        decode = entity_description.decode
         async with self._lock:
             if entity_description.url is not None:
                 self._urls[entity_description.url] = {
-                    "key": entity_description.key,
+                    "key": key,
                     short: entity_description.short,
+                    "refresh": entity_description.refresh,
+                    "decode": decode,
                 }
-            elif entity_description.short is not None:
-                self._status_keys[entity_description.short] = entity_description.key
+            if entity_description.short is not None:
+                self._status_keys[self._state.index(key)] = (
+                    entity_description.short,
+                    decode,
+                )
+                if entity_description.url is not None:
+                    self._bundled.add(entity_description.short)
+            if decode is not None:
+                self._decoders[key] = decode
+
+            self._build_routes()
+
+    def _build_routes(self) -> None:
+        """Build the table of message handlers from the registered endpoints.
+
+        Presence messages are routed by prefix and added to the table when
+        they are first received.
+        """
+        self._routes = {
+            url: self._route(item["key"], item["decode"])
+            for url, item in self._urls.items()
+        }
+        self._routes["/ecus/rrc/uiStatus"] = self._handle_ui_status
 
     async def connect(self) -> None:
         """Connect to nefit easy."""
@@ -129,25 +336,30 @@ class NefitEasy(DataUpdateCoordinator):
             _LOGGER.debug("Set is connecting to true")
             self.is_connecting = True
 
-            await self.nefit.connect()
-            _LOGGER.debug("Waiting for connected event.")
-            try:
-                await asyncio.wait_for(
-                    self.nefit.xmppclient.connected_event.wait(), timeout=29.0
-                )
-            except asyncio.TimeoutError:
-                _LOGGER.debug("TimeoutError on waiting for connected event.")
-            except:  # noqa: E722 pylint: disable=bare-except
-                _LOGGER.debug("Unknown error.")
-            else:
-                _LOGGER.debug("Connected successfully.")
-                self.connected_state = STATE_CONNECTED
+            # events may still be set by a previous session
+            self.nefit.xmppclient.connected_event.clear()
+            self.nefit.xmppclient.message_event.clear()
+
+            async with self._handshakes:
+                await self.nefit.connect()
+                _LOGGER.debug("Waiting for connected event.")
+                try:
+                    await asyncio.wait_for(
+                        self.nefit.xmppclient.connected_event.wait(), timeout=29.0
+                    )
+                except asyncio.TimeoutError:
+                    _LOGGER.debug("TimeoutError on waiting for connected event.")
+                except:  # noqa: E722 pylint: disable=bare-except
+                    _LOGGER.debug("Unknown error.")
+                else:
+                    _LOGGER.debug("Connected successfully.")
+                    self.connected_state = STATE_CONNECTED
 
             if self.connected_state == STATE_CONNECTED:
                 try:
                     self.nefit.get("/gateway/brandID")
                 except slixmpp.xmlstream.xmlstream.NotConnectedError:
-                    self.connected_state == STATE_INIT
+                    self.connected_state = STATE_INIT
                     _LOGGER.debug("Set is connecting to false")
                     self.is_connecting = False
                     return
@@ -172,6 +384,7 @@ class NefitEasy(DataUpdateCoordinator):
                     # No exception and no auth error
                     if self.connected_state == STATE_CONNECTED:
                         self.connected_state = STATE_CONNECTION_VERIFIED
+                        self._verified.set()
 
             if self.connected_state != STATE_CONNECTION_VERIFIED:
                 _LOGGER.debug("Successfully verified connection.")
@@ -181,10 +394,85 @@ class NefitEasy(DataUpdateCoordinator):
         else:
             _LOGGER.debug("Connection procedure is already running.")
 
+    async def async_wait_verified(self) -> None:
+        """Wait until the connection is verified."""
+        await self._verified.wait()
+
+    @callback
+    def async_connect_in_background(self) -> None:
+        """Connect in the background, the restored state is kept meanwhile."""
+        self.background_connect = True
+        self.async_start_reconnect()
+
+    @callback
+    def async_start_reconnect(self) -> None:
+        """Start the reconnect supervisor, unless it is running."""
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            return
+
+        self._reconnect_task = self.hass.async_create_background_task(
+            self._async_reconnect(), f"{DOMAIN} reconnect {self.serial}"
+        )
+
+    async def _async_reconnect(self) -> None:
+        """Connect until the connection is verified, then refresh.
+
+        The first attempt is made right away, failed attempts are retried
+        with a capped exponential backoff. Authentication failures are left
+        to failed_auth_handler.
+        """
+        if not self.background_connect:
+            # the first connect after a warm start is not a reconnect
+            self.stats.reconnects += 1
+        attempt = 0
+        while True:
+            if self.connected_state == STATE_ERROR_AUTH or self.expected_end:
+                return
+            self.stats.connect_attempts += 1
+            await self.connect()
+            if self.connected_state == STATE_CONNECTION_VERIFIED:
+                break
+
+            delay = self._reconnect_delay(attempt)
+            _LOGGER.debug(
+                "Reconnect of %s failed, retry in %.0f seconds", self.serial, delay
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        self.background_connect = False
+        await self.async_discover_capabilities()
+        await self.async_refresh()
+
+    @staticmethod
+    def _reconnect_delay(attempt: int) -> float:
+        """Return the delay before the next reconnect attempt.
+
+        The delay is randomized, so that instances that lost their connection
+        at the same time don't reconnect in lockstep.
+        """
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2**attempt)
+        return random.uniform(delay / 2, delay)
+
     async def shutdown(self, event: str) -> None:
         """Shutdown."""
         _LOGGER.debug("Shutdown connection to Bosch cloud")
+        await self.async_save_data()
         self.expected_end = True
+        if (
+            self._reconnect_task is not None
+            and self._reconnect_task is not asyncio.current_task()
+        ):
+            self._reconnect_task.cancel()
+        self._dispatcher.async_shutdown()
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+            self._write_timer = None
+        for timer in self._refresh_timers.values():
+            timer.cancel()
+        self._refresh_timers.clear()
+        self._writes.cancel_all()
+        self._pending.cancel_all()
         await self.nefit.disconnect()
 
     async def no_content_callback(self, data: Any) -> None:
@@ -194,6 +482,7 @@ class NefitEasy(DataUpdateCoordinator):
     async def failed_auth_handler(self, event: str) -> None:
         """Handle failed auth."""
         self.connected_state = STATE_ERROR_AUTH
+        self._verified.clear()
         self.nefit.xmppclient.connected_event.set()
 
         # disconnect, since nothing will work from now.
@@ -224,86 +513,643 @@ class NefitEasy(DataUpdateCoordinator):
 
             # Reset values
             self.connected_state = STATE_INIT
+            self._verified.clear()
             self.expected_end = False
 
+            self.async_start_reconnect()
+
     async def parse_message(self, data: dict[str, Any]) -> None:
         """Message received callback function for the XMPP client."""
-        if (
-            data["id"] == "/ecus/rrc/uiStatus"
-            and self.connected_state == STATE_CONNECTION_VERIFIED
-        ):
-            self._data["temp_setpoint"] = float(data["value"]["TSP"])  # for climate
-            self._data["inhouse_temperature"] = float(
-                data["value"]["IHT"]
-            )  # for climate
-            self._data["user_mode"] = data["value"]["UMD"]  # for climate
-            self._data["boiler_indicator"] = data["value"]["BAI"]  # for climate
-            self._data["last_update"] = data["value"]["CTD"]
-
-            for val, key in self._status_keys.items():
-                self._data[key] = data["value"].get(val)
-        elif (
-            data["id"].startswith("/ecus/rrc/homeentrancedetection/userprofile")
-            and self.connected_state == STATE_CONNECTION_VERIFIED
-        ):
-            m = re.search(r"(?<=userprofile)\w+", data["id"])
-            if m is not None:
-                id = m.group(0)
+        if self.connected_state != STATE_CONNECTION_VERIFIED:
+            return
 
-                val = data["id"].rsplit("/", 1)[-1]
+        id = data["id"]
+        # directories of the endpoint tree reply with references to their
+        # children instead of a value
+        value = data["value"] if "value" in data else data.get("references")
+        if (handler := self._routes.get(id)) is None:
+            handler = self._presence_route(id)
+        if handler is not None:
+            handler(value)
 
-                self._data[f"presence{id}_{val}"] = data["value"]
-        elif (
-            data["id"] in self._urls
-            and self.connected_state == STATE_CONNECTION_VERIFIED
-        ):
-            self._data[self._urls[data["id"]]["key"]] = data["value"]
+        # replies to requests are handled by the requester
+        if self._pending.late(id):
+            self.stats.late_replies += 1
+        elif self._pending.resolve(id, value) or handler is None:
+            return
         else:
+            self.stats.unsolicited += 1
+
+        if self._state.version != self._notified:
+            await self._dispatcher.async_call()
+
+    def _route(
+        self, key: str, decode: Callable[[Any], Any] | None
+    ) -> Callable[[Any], Any]:
+        """Return the handler that decodes and stores the value of a key."""
+        if decode is None:
+            return partial(self._state.set, self._state.index(key))
+        return partial(self._decode_set, self._state.index(key), decode)
+
+    def _decode_set(self, index: int, decode: Callable[[Any], Any], value: Any) -> None:
+        """Decode and store a value, a malformed value is dropped."""
+        try:
+            value = decode(value)
+        except (KeyError, TypeError, ValueError):
+            self.stats.malformed += 1
+            _LOGGER.debug("Dropped malformed value %r", value)
             return
 
-        if self._request == data["id"]:
-            self._event.set()
-        else:
-            self.async_set_updated_data(self._data)
+        self._state.set(index, value)
+
+    def _handle_ui_status(self, value: dict[str, Any]) -> None:
+        """Store the values of uiStatus."""
+        for index, (val, decode) in self._status_keys.items():
+            if val in value:
+                if decode is None:
+                    self._state.set(index, value[val])
+                else:
+                    self._decode_set(index, decode, value[val])
+            elif val in self._bundled:
+                if val not in self._unbundled:
+                    _LOGGER.debug("No %s in uiStatus, read its endpoint instead", val)
+                    self._unbundled.add(val)
+            else:
+                self._state.set(index, None)
+
+    def _presence_route(self, id: str) -> Callable[[Any], Any] | None:
+        """Return the handler of a presence message and add it to the routes.
+
+        The values of userprofile<index>/<name> are stored as
+        presence<index>_<name>.
+        """
+        if not id.startswith(PRESENCE_PREFIX):
+            return None
+
+        index = id[len(PRESENCE_PREFIX) :].split("/", 1)[0]
+        if not index:
+            return None
 
-    async def _async_update_data(self) -> dict[str, Any]:
+        val = id.rsplit("/", 1)[-1]
+        handler = self._routes[id] = partial(
+            self._state.set, self._state.index(f"presence{index}_{val}")
+        )
+        return handler
+
+    def _set(self, key: str, value: Any) -> None:
+        """Store a value, the store keeps track of changed keys."""
+        self._state.set(self._state.index(key), value)
+
+    def has_changed(self, keys: Iterable[str]) -> bool:
+        """Return whether any of the keys changed since the last update."""
+        return not self._changed.isdisjoint(keys)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners with the keys changed meanwhile."""
+        self._changed = self._state.changed_since(self._notified)
+        self._notified = self._state.version
+        super().async_update_listeners()
+        self._changed = frozenset()
+
+    async def _async_update_data(self) -> StateStore:
         """Update data via library."""
+        if (
+            self.connected_state != STATE_CONNECTION_VERIFIED
+            and self.background_connect
+        ):
+            _LOGGER.debug("Keep restored state while connecting in the background.")
+            return self._state
+
+        if self.connected_state == STATE_ERROR_AUTH:
+            # the credentials are known to be wrong, wait for a reauth
+            raise UpdateFailed(f"Authentication of Nefit easy {self.serial} failed")
+
         if self.connected_state != STATE_CONNECTION_VERIFIED:
             _LOGGER.debug("Starting reconnect procedure.")
-            await self.connect()
-            if self.connected_state != STATE_CONNECTION_VERIFIED:
-                raise UpdateFailed("Nefit easy not connected!")
+            self.async_start_reconnect()
+            raise UpdateFailed("Nefit easy not connected!")
+
+        now = dt_util.utcnow()
+        active = self.boiler_active
 
+        start = time.monotonic()
+        # the lock is only held to select the endpoints, the requests are
+        # scheduled by priority, so other requests don't wait for the refresh
         async with self._lock:
-            _url = "/ecus/rrc/uiStatus"
-            await self._async_get_url(_url)
+            acquired = time.monotonic()
+            self.stats.lock_wait.add(acquired - start)
+            urls = [
+                _url
+                for _url, item in self._urls.items()
+                if self._is_leaf(item)
+                and _url not in self._unsupported
+                and self.has_endpoint(_url)
+                and self._breakers.allow(_url, now)
+                and self._is_due(_url, item["refresh"], active, now)
+            ]
+
+            urls.insert(0, "/ecus/rrc/uiStatus")
+
+        results = await asyncio.gather(
+            *(
+                self._async_get_url(_url, priority=NefitPriority.BACKGROUND)
+                for _url in urls
+            ),
+            return_exceptions=True,
+        )
+
+        self.stats.update.add(time.monotonic() - acquired)
+
+        # every endpoint succeeds or fails on its own
+        failed = []
+        for _url, result in zip(urls, results):
+            if isinstance(
+                result,
+                (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError),
+            ):
+                _LOGGER.debug("No reply for %s, retry with the next update", _url)
+                failed.append(_url)
+                for key in self._endpoint_keys(_url):
+                    self._failed[key] = time.time()
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self._fetched[_url] = now
+                self._breakers.success(_url)
+                for key in self._endpoint_keys(_url):
+                    self._failed.pop(key, None)
 
-            for _url in self._urls:
-                await self._async_get_url(_url)
+        if len(failed) == len(urls):
+            raise UpdateFailed(f"No reply from Nefit easy {self.serial}")
 
-        return self._data
+        # other endpoints replied, so the failed ones are to blame
+        for _url in failed:
+            if _url != "/ecus/rrc/uiStatus" and self._breakers.failure(_url, now):
+                self._async_trip(_url)
+
+        self._updated_at = now
+        if self._saved_at is None or now - self._saved_at >= STORAGE_DATA_INTERVAL:
+            self._async_save()
+
+        # poll faster while the boiler is active
+        self.update_interval = (
+            UPDATE_INTERVAL_ACTIVE if self.boiler_active else UPDATE_INTERVAL_IDLE
+        )
+
+        return self._state
+
+    @property
+    def boiler_active(self) -> bool:
+        """Return whether the boiler is heating."""
+        return self._state.get("boiler_indicator") in BOILER_ACTIVE
+
+    @callback
+    def _async_trip(self, url: str) -> None:
+        """Handle an endpoint that is skipped after failing repeatedly.
+
+        An endpoint that never had a value is considered unsupported by the
+        device, and is not requested anymore, also after a restart.
+        """
+        key = self._urls[url]["key"]
+        if (entry := self._state.entry(key)) is not None and entry.version:
+            _LOGGER.debug("Skip %s for a while, it keeps failing", url)
+            return
+
+        _LOGGER.info("Endpoint %s of %s seems unsupported", url, self.serial)
+        self._unsupported.add(url)
+        self.async_set_stored("unsupported", sorted(self._unsupported))
+
+    @property
+    def unsupported(self) -> set[str]:
+        """Return the endpoints the device does not support."""
+        return set(self._unsupported)
+
+    async def async_discover_capabilities(self) -> None:
+        """Find the endpoints the device has, see async_probe.
+
+        The endpoints are kept per firmware version. The device is probed
+        again when its firmware changed, or when entities use endpoints that
+        were not probed before. The platforms add the entities the device
+        turns out to have on SIGNAL_CAPABILITIES.
+        """
+        try:
+            firmware = await self._async_get_url(FIRMWARE_URL)
+        except (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError):
+            _LOGGER.debug("No firmware version of %s, keep its endpoints", self.serial)
+            return
+
+        known = self._capabilities
+        if (
+            known is not None
+            and known.firmware == firmware
+            and known.covers(ENTITY_URLS)
+        ):
+            return
+
+        _LOGGER.debug("Probe the endpoints of %s, firmware %s", self.serial, firmware)
+        self._capabilities = await async_probe(
+            self._async_get_url, firmware, ENTITY_URLS
+        )
+        if known is not None and known.firmware != firmware and self._unsupported:
+            # the new firmware may support endpoints the old one did not
+            self._unsupported.clear()
+            self._stored["unsupported"] = []
+        self.async_set_stored("capabilities", self._capabilities.as_dict())
+        async_dispatcher_send(self.hass, SIGNAL_CAPABILITIES.format(self.serial))
+
+    def has_endpoint(self, url: str) -> bool:
+        """Return whether the device has an endpoint, or it is not known yet."""
+        return self._capabilities is None or self._capabilities.has(url) is not False
+
+    def supports(self, description: NefitEntityDescription) -> bool:
+        """Return whether the device has the endpoint of an entity.
+
+        Entities that are read from uiStatus are always supported.
+        """
+        if description.url is None or description.short is not None:
+            return True
+        return self.has_endpoint(description.url)
+
+    def circuits(self, directory: str) -> list[str]:
+        """Return the circuits of the device in a directory.
+
+        The circuit uiStatus reports comes first. While the circuits are not
+        known, that circuit is assumed.
+        """
+        default = DEFAULT_CIRCUITS[directory]
+        if (
+            self._capabilities is None
+            or (circuits := self._capabilities.circuits(directory)) is None
+        ):
+            return [default]
+
+        return sorted(
+            circuits, key=lambda circuit: (circuit != default, len(circuit), circuit)
+        )
+
+    def expand(
+        self, descriptions: Iterable[NefitEntityDescription]
+    ) -> Sequence[NefitEntityDescription]:
+        """Return the descriptions, with templates repeated for every circuit."""
+        expanded = []
+        for description in descriptions:
+            if description.circuits is None:
+                expanded.append(description)
+                continue
+
+            circuits = self.circuits(description.circuits)
+            for index, circuit in enumerate(circuits):
+                circuit_description = description.for_circuit(circuit, index == 0)
+                if circuit_description is not None:
+                    expanded.append(circuit_description)
+
+        return expanded
+
+    @property
+    def firmware(self) -> str | None:
+        """Return the firmware version the endpoints were probed with."""
+        return None if self._capabilities is None else self._capabilities.firmware
+
+    @property
+    def breakers(self) -> EndpointBreakers:
+        """Return the circuit breakers of the endpoints."""
+        return self._breakers
+
+    def _endpoint_keys(self, url: str) -> list[str]:
+        """Return the keys that are read from an endpoint."""
+        if url == "/ecus/rrc/uiStatus":
+            return [self._state.key(index) for index in self._status_keys]
+        return [self._urls[url]["key"]]
+
+    def is_available(self, keys: Iterable[str]) -> bool:
+        """Return whether the values of all keys are known.
+
+        A key is unavailable after its refresh failed, until a value for it
+        is received. Nothing is available before the first refresh.
+        """
+        if not self.last_update_success or self.data is None:
+            return False
+
+        for key in keys:
+            if (failed := self._failed.get(key)) is None:
+                continue
+            entry = self._state.entry(key)
+            if entry is None or entry.received is None or entry.received < failed:
+                return False
+
+        return True
+
+    @property
+    def last_success(self) -> dict[str, datetime]:
+        """Return when each endpoint was last refreshed successfully."""
+        return dict(self._fetched)
+
+    def _is_leaf(self, item: dict[str, Any]) -> bool:
+        """Return whether an endpoint is read on its own, not from uiStatus."""
+        return item[short] is None or item[short] in self._unbundled
+
+    def _is_due(
+        self, url: str, refresh: NefitRefresh, active: bool, now: datetime
+    ) -> bool:
+        """Return whether an endpoint has to be refreshed."""
+        fetched = self._fetched.get(url)
+        if fetched is None:
+            return True
+
+        interval = REFRESH_INTERVALS[refresh][0 if active else 1]
+        return now - fetched >= interval - REFRESH_MARGIN
+
+    async def async_write(
+        self,
+        endpoint: str,
+        send: Callable[[], None],
+        readback: str,
+        updates: dict[str, Any],
+    ) -> None:
+        """Write to the device and wait until it confirms the write.
+
+        The updates are applied at once and rolled back if the write fails.
+        A write is sent at once, writes that follow within WRITE_SETTLE
+        seconds are collected and sent together, so that a burst of writes
+        to the same endpoint only sends the first and the latest value.
+        """
+        if self.connected_state != STATE_CONNECTION_VERIFIED:
+            raise HomeAssistantError(f"Nefit easy {self.serial} is not connected")
+
+        future = self._writes.add(endpoint, send, readback, updates, self._state)
+        for key, value in updates.items():
+            self._set(key, value)
+        self.async_update_listeners()
+
+        if self._write_timer is None:
+            self._async_start_flush()
+
+        await future
+
+    async def async_put_value(self, url: str, key: str, value: Any) -> None:
+        """Write the value of an endpoint, see async_write."""
+        decode = self._decoders.get(key)
+        await self.async_write(
+            url,
+            lambda: self.nefit.put_value(url, value),
+            url,
+            {key: value if decode is None else decode(value)},
+        )
+
+    @callback
+    def _async_start_flush(self) -> None:
+        """Send the queued writes and collect new writes for a while."""
+        if not self._writes:
+            self._write_timer = None
+            return
+
+        self._write_timer = self.hass.loop.call_later(
+            WRITE_SETTLE, self._async_start_flush
+        )
+        self.hass.async_create_background_task(
+            self._async_flush_writes(), f"{DOMAIN} writes {self.serial}"
+        )
+
+    async def _async_flush_writes(self) -> None:
+        """Send the queued writes in order and read them back.
+
+        The device acknowledges a PUT with an empty reply without an id, so
+        the writes are confirmed by reading back their endpoints: the device
+        answers in order, so the replies reflect the writes. Writes with the
+        same read-back share one request.
+        """
+        writes = self._writes.pop_all()
+        errors: dict[int, Exception] = {}
+        for index, write in enumerate(writes):
+            assert write.send is not None
+            try:
+                write.send()
+            except slixmpp.xmlstream.xmlstream.NotConnectedError as err:
+                errors[index] = err
+
+        readbacks = list(
+            dict.fromkeys(
+                write.readback
+                for index, write in enumerate(writes)
+                if index not in errors
+            )
+        )
+        results = dict(
+            zip(
+                readbacks,
+                await asyncio.gather(
+                    *(
+                        self._async_get_url(
+                            url, fresh=True, priority=NefitPriority.INTERACTIVE
+                        )
+                        for url in readbacks
+                    ),
+                    return_exceptions=True,
+                ),
+            )
+        )
+
+        confirmed = False
+        for index, write in enumerate(writes):
+            result = errors.get(index, results.get(write.readback))
+            if isinstance(result, asyncio.CancelledError):
+                # the read-back was cancelled by a shutdown, the write is
+                # not confirmed
+                for future in write.futures:
+                    future.cancel()
+            elif isinstance(result, BaseException):
+                self._rollback_write(write, result)
+            else:
+                confirmed = True
+                for future in write.futures:
+                    if not future.done():
+                        future.set_result(None)
+
+        self.async_update_listeners()
+        if confirmed:
+            self.async_refresh_later("/ecus/rrc/uiStatus", WRITE_REFRESH_DELAY)
+
+    def _rollback_write(self, write: PendingWrite, err: BaseException) -> None:
+        """Restore the values of a failed write and fail its callers."""
+        _LOGGER.debug("Writing %s failed: %r", write.readback, err)
+        for key, value in write.previous.items():
+            # keep values that were pushed by the device meanwhile
+            if self._state.get(key) == write.updates[key]:
+                self._set(key, value)
+        self.invalidate(write.readback)
+
+        for future in write.futures:
+            if not future.done():
+                exc = HomeAssistantError(f"Writing {write.readback} failed")
+                exc.__cause__ = err
+                future.set_exception(exc)
+
+    def invalidate(self, url: str) -> None:
+        """Refresh an endpoint on the next update, e.g. after writing it."""
+        self._fetched.pop(url, None)
 
     async def async_init_presence(self, endpoint: str, index: int) -> Any:
         """Init presence detection."""
-        async with self._lock:
-            url = f"{endpoint}/userprofile{index}/active"
-            await self._async_get_url(url)
+        url = f"{endpoint}/userprofile{index}/active"
+        if await self._async_get_url(url) == "on":
+            url = f"{endpoint}/userprofile{index}/name"
+            return await self._async_get_url(url)
+
+        return None
 
-            if self._data[f"presence{index}_active"] == "on":
-                url = f"{endpoint}/userprofile{index}/name"
-                await self._async_get_url(url)
+    def get_stored(self, key: str) -> Any:
+        """Return device information that is kept across restarts."""
+        return self._stored.get(key)
 
-                return self._data.get(f"presence{index}_name")
+    @callback
+    def async_set_stored(self, key: str, value: Any) -> None:
+        """Keep device information across restarts."""
+        self._stored[key] = value
+        self._async_save()
 
+    @property
+    def presence_profiles(self) -> dict[int, str] | None:
+        """Return the presence profiles found before, if any."""
+        if (profiles := self._stored.get("presence")) is None:
             return None
 
-    async def update_ui_status_later(self, delay: float) -> None:
-        """Force update of uiStatus after delay."""
-        self.hass.loop.call_later(delay, self.nefit.get, "/ecus/rrc/uiStatus")
+        return {int(index): name for index, name in profiles.items()}
+
+    async def async_discover_presence(self, endpoint: str) -> dict[int, str]:
+        """Find the active presence profiles and store them.
+
+        All profiles are probed at once. Profiles that can't be probed keep
+        the result found before.
+        """
+        indexes = range(0, 10)
+        results = await asyncio.gather(
+            *(self.async_init_presence(endpoint, i) for i in indexes),
+            return_exceptions=True,
+        )
+
+        known = self.presence_profiles or {}
+        profiles: dict[int, str] = {}
+        for index, result in zip(indexes, results):
+            if isinstance(
+                result,
+                (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError),
+            ):
+                _LOGGER.debug("No reply probing presence profile %s", index)
+                result = known.get(index)
+            elif isinstance(result, BaseException):
+                raise result
+
+            if result is not None:
+                profiles[index] = result
+
+        self._stored["presence"] = {str(i): name for i, name in profiles.items()}
+        self._async_save()
+
+        return profiles
+
+    @callback
+    def async_refresh_later(self, url: str, delay: float) -> None:
+        """Read an endpoint after a delay.
+
+        A refresh that is already scheduled for the endpoint is merged with
+        this one, the earliest of both is kept. Nothing is scheduled after
+        a shutdown.
+        """
+        if self.expected_end:
+            return
 
-    async def _async_get_url(self, url: str) -> None:
-        self._event.clear()
-        self._request = url
-        self.nefit.get(url)
-        await asyncio.wait_for(self._event.wait(), timeout=9)
-        self._request = ""
+        when = self.hass.loop.time() + delay
+        timer = self._refresh_timers.get(url)
+        if timer is not None:
+            if timer.when() <= when:
+                return
+            timer.cancel()
+
+        self._refresh_timers[url] = self.hass.loop.call_at(
+            when, self._async_start_refresh, url
+        )
+
+    @callback
+    def _async_start_refresh(self, url: str) -> None:
+        """Start a scheduled refresh of an endpoint."""
+        del self._refresh_timers[url]
+        self.hass.async_create_background_task(
+            self._async_refresh_url(url), f"{DOMAIN} refresh {url}"
+        )
+
+    async def _async_refresh_url(self, url: str) -> None:
+        """Read an endpoint and update the entities."""
+        try:
+            await self._async_get_url(url)
+        except (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError):
+            _LOGGER.debug("No reply for %s, refresh it with the next update", url)
+            self.invalidate(url)
+            return
+
+        self.async_update_listeners()
+
+    async def async_get_value(self, url: str, reply_id: str | None = None) -> Any:
+        """Read an endpoint that is not polled in the background."""
+        return await self._async_get_url(
+            url, reply_id=reply_id, priority=NefitPriority.BACKGROUND
+        )
+
+    async def _async_get_url(
+        self,
+        url: str,
+        fresh: bool = False,
+        timeout: float = 9,
+        reply_id: str | None = None,
+        priority: NefitPriority = NefitPriority.NORMAL,
+    ) -> Any:
+        """Request an endpoint and wait for its reply.
+
+        Requests are sent concurrently, at most max_in_flight at a time,
+        queued requests are sent by priority. A request for an endpoint that
+        is already in flight shares the outstanding reply, unless fresh is
+        set. The reply is expected with the id of the url, or with reply_id
+        for urls with a query.
+        """
+        if reply_id is None:
+            reply_id = url
+        if fresh or not self._pending.in_flight(reply_id):
+            start = time.monotonic()
+            await self._scheduler.acquire(priority)
+            self.stats.queue_wait[priority].add(time.monotonic() - start)
+            try:
+                # requests are numbered when they are sent, requests for an
+                # endpoint may be sent out of order by priority
+                future, send = self._pending.add(reply_id, fresh)
+                if send:
+                    return await self._async_request(url, reply_id, future, timeout)
+            finally:
+                self._scheduler.release()
+        else:
+            future, _ = self._pending.add(reply_id)
+
+        # shares the reply of a request in flight
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.discard(reply_id, future)
+
+    async def _async_request(
+        self, url: str, reply_id: str, future: asyncio.Future[Any], timeout: float
+    ) -> Any:
+        """Send a request and wait for its reply, see _async_get_url."""
+        sent = False
+        try:
+            self.stats.request(reply_id)
+            start = time.monotonic()
+            self.nefit.get(url)
+            sent = True
+            try:
+                value = await asyncio.wait_for(future, timeout=timeout)
+            except asyncio.TimeoutError:
+                self.stats.timeout(reply_id)
+                raise
+            self.stats.reply(reply_id, time.monotonic() - start)
+            return value
+        finally:
+            self._pending.discard(reply_id, future, sent)
@@ -0,0 +1,73 @@
+"""Circuit breakers of endpoints that keep failing."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from .const import BREAKER_BACKOFF, BREAKER_MAX_BACKOFF, BREAKER_THRESHOLD
+
+
+class CircuitBreaker:
+    """Consecutive failures of an endpoint and until when it is skipped."""
+
+    __slots__ = ("failures", "open_until")
+
+    def __init__(self) -> None:
+        """Initialize the breaker."""
+        self.failures = 0
+        self.open_until: datetime | None = None
+
+
+class EndpointBreakers:
+    """Circuit breakers keyed by endpoint.
+
+    An endpoint that fails BREAKER_THRESHOLD times in a row is skipped for
+    BREAKER_BACKOFF. When the backoff ends the endpoint is probed with a
+    single request: a failure doubles the backoff up to BREAKER_MAX_BACKOFF,
+    a success closes the breaker.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the breakers."""
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def allow(self, url: str, now: datetime) -> bool:
+        """Return whether an endpoint may be requested."""
+        breaker = self._breakers.get(url)
+        return (
+            breaker is None or breaker.open_until is None or now >= breaker.open_until
+        )
+
+    def success(self, url: str) -> None:
+        """Close the breaker of an endpoint that replied."""
+        self._breakers.pop(url, None)
+
+    def failure(self, url: str, now: datetime) -> bool:
+        """Count a failure of an endpoint and return whether it is skipped now."""
+        if (breaker := self._breakers.get(url)) is None:
+            breaker = self._breakers[url] = CircuitBreaker()
+
+        breaker.failures += 1
+        if breaker.failures < BREAKER_THRESHOLD:
+            return False
+
+        backoff = min(
+            BREAKER_MAX_BACKOFF,
+            BREAKER_BACKOFF * 2 ** (breaker.failures - BREAKER_THRESHOLD),
+        )
+        breaker.open_until = now + backoff
+        return True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breakers as a dict."""
+        return {
+            url: {
+                "failures": breaker.failures,
+                "open_until": (
+                    None
+                    if breaker.open_until is None
+                    else breaker.open_until.isoformat()
+                ),
+            }
+            for url, breaker in sorted(self._breakers.items())
+        }
@@ -0,0 +1,157 @@
+"""Discovery of the endpoints a device has.
+
+The endpoint tree of a device is made of directories that reply with the
+references to their children, and of endpoints that reply with a value.
+The urls of templates have a placeholder for the circuit, which matches
+every circuit of the device.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+import slixmpp
+
+from .const import CIRCUIT, PROBE_ROOTS
+
+
+def _directories(url: str) -> list[str]:
+    """Return the directories of an endpoint, from its root down."""
+    for root in PROBE_ROOTS:
+        if url.startswith(f"{root}/"):
+            parts = url[len(root) + 1 :].split("/")[:-1]
+            directories = [root]
+            for part in parts:
+                directories.append(f"{directories[-1]}/{part}")
+            return directories
+    return []
+
+
+def _matches(path: str, pattern: str) -> bool:
+    """Return whether a path matches a path that may have a placeholder."""
+    if CIRCUIT not in pattern:
+        return path == pattern
+
+    parts = path.split("/")
+    pattern_parts = pattern.split("/")
+    return len(parts) == len(pattern_parts) and all(
+        part == pattern_part or pattern_part == CIRCUIT
+        for part, pattern_part in zip(parts, pattern_parts)
+    )
+
+
+class Capabilities:
+    """The endpoints a device with a firmware version has.
+
+    Only the directories on the way to the endpoints of the entities are
+    walked, the endpoints below other directories are unknown.
+    """
+
+    __slots__ = ("firmware", "endpoints", "walked")
+
+    def __init__(
+        self, firmware: str | None, endpoints: Iterable[str], walked: Iterable[str]
+    ) -> None:
+        """Initialize the capabilities."""
+        self.firmware = firmware
+        self.endpoints = frozenset(endpoints)
+        self.walked = frozenset(walked)
+
+    def has(self, url: str) -> bool | None:
+        """Return whether the device has an endpoint, None if it is unknown."""
+        if not (directories := _directories(url)):
+            return None
+
+        for directory, child in zip(directories, [*directories[1:], url]):
+            if directory not in self.walked:
+                return None
+            if child not in self.endpoints:
+                return False
+        return True
+
+    def circuits(self, directory: str) -> list[str] | None:
+        """Return the circuits in a directory, None if it is unknown."""
+        if directory not in self.walked:
+            return None
+
+        prefix = f"{directory}/"
+        return [
+            endpoint[len(prefix) :]
+            for endpoint in self.endpoints
+            if endpoint.startswith(prefix) and "/" not in endpoint[len(prefix) :]
+        ]
+
+    def covers(self, urls: Iterable[str]) -> bool:
+        """Return whether it is known for all endpoints if the device has them.
+
+        A template is covered if it is known for all circuits.
+        """
+        for url in urls:
+            if not _directories(url):
+                continue
+            if CIRCUIT not in url:
+                if self.has(url) is None:
+                    return False
+                continue
+
+            directory = url.split(f"/{CIRCUIT}", 1)[0]
+            if (circuits := self.circuits(directory)) is None:
+                return False
+            if any(
+                self.has(url.replace(CIRCUIT, circuit)) is None for circuit in circuits
+            ):
+                return False
+
+        return True
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Capabilities:
+        """Return the capabilities stored by as_dict."""
+        return cls(data.get("firmware"), data["endpoints"], data["walked"])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the capabilities as a dict to store."""
+        return {
+            "firmware": self.firmware,
+            "endpoints": sorted(self.endpoints),
+            "walked": sorted(self.walked),
+        }
+
+
+async def async_probe(
+    get: Callable[[str], Awaitable[Any]], firmware: str | None, urls: Iterable[str]
+) -> Capabilities:
+    """Walk the directories of the endpoint tree that lead to the endpoints.
+
+    The directories of a level are requested at once. A directory that
+    doesn't reply is not walked, so the endpoints below it stay unknown.
+    """
+    needed = {directory for url in urls for directory in _directories(url)}
+    endpoints: set[str] = set()
+    walked: set[str] = set()
+
+    level = [root for root in PROBE_ROOTS if root in needed]
+    while level:
+        results = await asyncio.gather(
+            *(get(directory) for directory in level), return_exceptions=True
+        )
+        children = []
+        for directory, result in zip(level, results):
+            if isinstance(
+                result,
+                (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError),
+            ):
+                continue
+            if isinstance(result, BaseException):
+                raise result
+
+            walked.add(directory)
+            endpoints.add(directory)
+            for reference in result if isinstance(result, list) else ():
+                endpoints.add(child := reference["id"])
+                if any(_matches(child, pattern) for pattern in needed):
+                    children.append(child)
+        level = children
+
+    return Capabilities(firmware, endpoints, walked)
@@ -1,7 +1,6 @@
 """Support for Bosch home thermostats."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from types import MappingProxyType
 from typing import Any
@@ -16,10 +15,10 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import NefitEasy
 from .const import (
+    ATTR_CACHED_AT,
     CONF_MAX_TEMP,
     CONF_MIN_TEMP,
     CONF_NAME,
@@ -27,6 +26,7 @@ from .const import (
     CONF_TEMP_STEP,
     DOMAIN,
 )
+from .nefit_entity import NefitCoordinatorEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -54,9 +54,19 @@ async def async_setup_entry(
     async_add_entities(entities, update_before_add=True)
 
 
-class NefitThermostat(CoordinatorEntity, ClimateEntity):
+class NefitThermostat(NefitCoordinatorEntity, ClimateEntity):
     """Representation of a NefitThermostat device."""
 
+    _data_keys = frozenset(
+        (
+            "inhouse_temperature",
+            "temp_setpoint",
+            "user_mode",
+            "boiler_indicator",
+            "last_update",
+        )
+    )
+
     def __init__(self, client: NefitEasy, data: MappingProxyType[str, Any]) -> None:
         """Initialize the thermostat."""
         super().__init__(client)
@@ -95,14 +105,14 @@ class NefitThermostat(CoordinatorEntity, ClimateEntity):
         return self._unit_of_measurement
 
     @property
-    def current_temperature(self) -> float:
+    def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return float(self.coordinator.data.get("inhouse_temperature"))
+        return self.coordinator.data.get("inhouse_temperature")
 
     @property
-    def target_temperature(self) -> float:
+    def target_temperature(self) -> float | None:
         """Return target temperature."""
-        return float(self.coordinator.data.get("temp_setpoint"))
+        return self.coordinator.data.get("temp_setpoint")
 
     @property
     def hvac_modes(self) -> list[str]:
@@ -140,11 +150,16 @@ class NefitThermostat(CoordinatorEntity, ClimateEntity):
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the nefit specific state attributes."""
-        return {
+        attributes = {
             "last_update": self.coordinator.data.get("last_update"),
             "boiler_indicator": self.coordinator.data.get("boiler_indicator"),
         }
 
+        if (cached_at := self.coordinator.cached_at(self._data_keys)) is not None:
+            attributes[ATTR_CACHED_AT] = cached_at
+
+        return attributes
+
     @property
     def min_temp(self) -> float:
         """Return the minimum temperature."""
@@ -163,23 +178,20 @@ class NefitThermostat(CoordinatorEntity, ClimateEntity):
         else:
             new_mode = "manual"
 
-        self._client.nefit.set_usermode(new_mode)
-        await asyncio.wait_for(
-            self._client.nefit.xmppclient.message_event.wait(), timeout=9
+        await self._client.async_write(
+            "/heatingCircuits/hc1/usermode",
+            lambda: self._client.nefit.set_usermode(new_mode),
+            "/ecus/rrc/uiStatus",
+            {"user_mode": new_mode},
         )
-        self._client.nefit.xmppclient.message_event.clear()
-
-        self._client.nefit.get("/ecus/rrc/uiStatus")
-        await self._client.update_ui_status_later(2)
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
         temperature = kwargs.get(ATTR_TEMPERATURE)
         _LOGGER.debug("set_temperature called (temperature=%s)", temperature)
-        self._client.nefit.set_temperature(temperature)
-        await asyncio.wait_for(
-            self._client.nefit.xmppclient.message_event.wait(), timeout=9
+        await self._client.async_write(
+            "/heatingCircuits/hc1/temperatureRoomManual",
+            lambda: self._client.nefit.set_temperature(temperature),
+            "/ecus/rrc/uiStatus",
+            {"temp_setpoint": float(temperature)},
         )
-        self._client.nefit.xmppclient.message_event.clear()
-
-        self._client.nefit.get("/ecus/rrc/uiStatus")
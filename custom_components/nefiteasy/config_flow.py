@@ -16,14 +16,19 @@ from .const import (  # pylint:disable=unused-import
     AUTH_ERROR_CREDENTIALS,
     AUTH_ERROR_PASSWORD,
     CONF_ACCESSKEY,
+    CONF_CALORIFIC_VALUE,
+    CONF_FUEL_TYPE,
+    CONF_MAX_IN_FLIGHT,
     CONF_MAX_TEMP,
     CONF_MIN_TEMP,
     CONF_NAME,
     CONF_PASSWORD,
     CONF_SERIAL,
     CONF_TEMP_STEP,
+    DEFAULT_MAX_IN_FLIGHT,
     DOMAIN,
 )
+from .models import NefitFuelType
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -114,6 +119,14 @@ class NefitEasyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
+    @staticmethod
+    @core.callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> NefitEasyOptionsFlow:
+        """Get the options flow for this handler."""
+        return NefitEasyOptionsFlow()
+
     def __init__(self) -> None:
         """Init nefity easy config flow."""
         self._serial = None
@@ -188,6 +201,37 @@ class NefitEasyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class NefitEasyOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of Nefit Easy Bosch Thermostat."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Step to set the fuel, its calorific value and the request window."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_FUEL_TYPE,
+                    default=options.get(CONF_FUEL_TYPE, NefitFuelType.NATURAL_GAS),
+                ): vol.In([fuel_type.value for fuel_type in NefitFuelType]),
+                vol.Optional(
+                    CONF_CALORIFIC_VALUE,
+                    description={"suggested_value": options.get(CONF_CALORIFIC_VALUE)},
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+                vol.Required(
+                    CONF_MAX_IN_FLIGHT,
+                    default=options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
 
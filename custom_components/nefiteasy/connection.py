@@ -0,0 +1,23 @@
+"""Connections with the Bosch cloud, shared by the thermostats of an instance."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_HANDSHAKES, MAX_HANDSHAKES
+
+
+@callback
+def async_get_handshakes(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Return the slots for sessions that connect to the Bosch server.
+
+    The server authenticates a session as the contact of one thermostat, so
+    every thermostat has its own session. The number of sessions that do
+    their TLS handshake at the same time is bounded, so that a restart with
+    several thermostats does not open them all at once.
+    """
+    handshakes: asyncio.Semaphore | None = hass.data.get(DATA_HANDSHAKES)
+    if handshakes is None:
+        handshakes = hass.data[DATA_HANDSHAKES] = asyncio.Semaphore(MAX_HANDSHAKES)
+    return handshakes
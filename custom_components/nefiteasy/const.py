@@ -1,18 +1,33 @@
 """Constants for the nefiteasy component."""
 from __future__ import annotations
 
+from datetime import timedelta
+
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.const import (
     PERCENTAGE,
+    EntityCategory,
+    UnitOfEnergy,
     UnitOfPressure,
     UnitOfTemperature,
+    UnitOfTime,
     UnitOfVolume,
 )
 
+from .decoders import (
+    decode_display_code,
+    decode_float,
+    decode_temperature,
+    option_decoder,
+)
 from .models import (
+    NefitFuelType,
+    NefitGasSensorEntityDescription,
     NefitNumberEntityDescription,
+    NefitRefresh,
     NefitSelectEntityDescription,
     NefitSensorEntityDescription,
+    NefitStatsSensorEntityDescription,
     NefitSwitchEntityDescription,
 )
 
@@ -28,6 +43,106 @@ CONF_MAX_TEMP = "max_temp"
 CONF_TEMP_STEP = "temp_step"
 CONF_SWITCHES = "switches"
 CONF_SENSORS = "sensors"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_FUEL_TYPE = "fuel_type"
+CONF_CALORIFIC_VALUE = "calorific_value"
+
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# typical calorific value per fuel, in kWh per m³
+CALORIFIC_VALUES: dict[NefitFuelType, float] = {
+    NefitFuelType.NATURAL_GAS: 8.125,
+    NefitFuelType.LPG: 24.544,
+}
+
+# boiler indicator values while the boiler is heating
+BOILER_ACTIVE = ("CH", "HW")
+
+UPDATE_INTERVAL_ACTIVE = timedelta(seconds=30)
+UPDATE_INTERVAL_IDLE = timedelta(seconds=60)
+
+# refresh interval per refresh class, while the boiler is active and idle
+REFRESH_INTERVALS: dict[NefitRefresh, tuple[timedelta, timedelta]] = {
+    NefitRefresh.FAST: (timedelta(seconds=30), timedelta(minutes=2)),
+    NefitRefresh.NORMAL: (timedelta(minutes=1), timedelta(minutes=2)),
+    NefitRefresh.SLOW: (timedelta(minutes=5), timedelta(minutes=10)),
+    NefitRefresh.STATIC: (timedelta(hours=1), timedelta(hours=1)),
+}
+# allow for refreshes that are scheduled a bit early
+REFRESH_MARGIN = timedelta(seconds=5)
+
+# seconds in which pushed messages are coalesced into one entity update
+DISPATCH_COOLDOWN = 1.0
+# seconds in which writes are collected before they are sent together
+WRITE_SETTLE = 0.5
+# seconds after a write to read uiStatus again, the device applies some
+# writes with a delay
+WRITE_REFRESH_DELAY = 2
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+# interval to save the last known state, to restore it after a restart
+STORAGE_DATA_INTERVAL = timedelta(minutes=15)
+
+ATTR_CACHED_AT = "cached_at"
+
+# failures in a row after which an endpoint is skipped, and for how long
+BREAKER_THRESHOLD = 3
+BREAKER_BACKOFF = timedelta(minutes=30)
+BREAKER_MAX_BACKOFF = timedelta(hours=12)
+
+# backoff of reconnect attempts, in seconds
+RECONNECT_BASE_DELAY = 10
+RECONNECT_MAX_DELAY = 600
+
+# key of the handshake slots in hass.data
+DATA_HANDSHAKES = f"{DOMAIN}_handshakes"
+# sessions that may be connecting to the Bosch server at the same time
+MAX_HANDSHAKES = 2
+
+# upper bounds of the buckets of the reply latency histogram, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# gas usage history, the device keeps a page of entries per 32 days
+GAS_USAGE_URL = "/ecus/rrc/recordings/gasusage"
+GAS_USAGE_POINTER_URL = "/ecus/rrc/recordings/gasusagePointer"
+GAS_USAGE_PAGE_SIZE = 32
+# interval to import new gas usage entries, the device adds one per day
+GAS_USAGE_INTERVAL = timedelta(hours=6)
+
+# fields of uiStatus the climate entity uses, their keys and decoders
+UI_STATUS_FIELDS = {
+    "TSP": ("temp_setpoint", decode_temperature),
+    "IHT": ("inhouse_temperature", decode_temperature),
+    "UMD": ("user_mode", None),
+    "BAI": ("boiler_indicator", None),
+    "CTD": ("last_update", None),
+}
+
+# directories of the circuits of a device
+HEATING_CIRCUITS = "/heatingCircuits"
+HOT_WATER_CIRCUITS = "/dhwCircuits"
+# the circuits uiStatus reports, also used while the circuits are not known
+DEFAULT_CIRCUITS = {HEATING_CIRCUITS: "hc1", HOT_WATER_CIRCUITS: "dhwA"}
+# placeholder of the circuit in the url of a template
+CIRCUIT = "{circuit}"
+
+# roots of the endpoint tree that are probed for the endpoints a device has
+PROBE_ROOTS = (
+    "/gateway",
+    "/ecus/rrc",
+    "/system",
+    HEATING_CIRCUITS,
+    HOT_WATER_CIRCUITS,
+)
+# the endpoints a device has are probed again when its firmware changed
+FIRMWARE_URL = "/gateway/versionFirmware"
+# dispatched when the endpoints a device has are known, with its serial
+SIGNAL_CAPABILITIES = f"{DOMAIN}_capabilities_{{}}"
+
+# presence detection, and the prefix of the ids of its messages
+PRESENCE_URL = "/ecus/rrc/homeentrancedetection"
+PRESENCE_PREFIX = f"{PRESENCE_URL}/userprofile"
 
 STATE_CONNECTED = "connected"
 STATE_CONNECTION_VERIFIED = "connection_verified"
@@ -45,39 +160,64 @@ short = "short"
 icon = "icon"
 options = "options"
 
+ACTIVE_PROGRAM_OPTIONS = {
+    0: "Clock 1",
+    1: "Clock 2",
+}
+
 SELECTS: tuple[NefitSelectEntityDescription, ...] = (
     NefitSelectEntityDescription(
         key="active_program",
         name="Active program",
         url="/ecus/rrc/userprogram/activeprogram",
         icon="mdi:calendar-today",
-        options={
-            0: "Clock 1",
-            1: "Clock 2",
-        },
+        options=ACTIVE_PROGRAM_OPTIONS,
+        decode=option_decoder(ACTIVE_PROGRAM_OPTIONS),
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.STATIC,
     ),
 )
 
 SENSORS: tuple[NefitSensorEntityDescription, ...] = (
-    NefitSensorEntityDescription(
+    NefitGasSensorEntityDescription(
         key="year_total",
         name="Year total",
         url="/ecus/rrc/recordings/yearTotal",
         unit=UnitOfVolume.CUBIC_METERS,
         device_class=SensorDeviceClass.GAS,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        refresh=NefitRefresh.SLOW,
+        decode=decode_float,
+        volume=True,
+    ),
+    NefitGasSensorEntityDescription(
+        key="year_total_energy",
+        name="Year total energy",
+        url="/ecus/rrc/recordings/yearTotal",
+        data_key="year_total",
+        decode=decode_float,
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSensorEntityDescription(
-        key="status", name="status", url="/system/appliance/displaycode"
+        key="status",
+        name="status",
+        url="/system/appliance/displaycode",
+        decode=decode_display_code,
     ),
     NefitSensorEntityDescription(
         key="supply_temperature",
         name="Supply temperature",
-        url="/heatingCircuits/hc1/actualSupplyTemperature",
+        url="/heatingCircuits/{circuit}/actualSupplyTemperature",
+        circuits=HEATING_CIRCUITS,
         unit=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_temperature,
+        refresh=NefitRefresh.FAST,
     ),
     NefitSensorEntityDescription(
         key="outdoor_temperature",
@@ -86,6 +226,7 @@ SENSORS: tuple[NefitSensorEntityDescription, ...] = (
         unit=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_temperature,
     ),
     NefitSensorEntityDescription(
         key="system_pressure",
@@ -94,6 +235,7 @@ SENSORS: tuple[NefitSensorEntityDescription, ...] = (
         unit=UnitOfPressure.BAR,
         device_class=SensorDeviceClass.PRESSURE,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_float,
     ),
     NefitSensorEntityDescription(
         key="actual_power",
@@ -102,12 +244,16 @@ SENSORS: tuple[NefitSensorEntityDescription, ...] = (
         unit=PERCENTAGE,
         device_class=SensorDeviceClass.POWER_FACTOR,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_float,
+        refresh=NefitRefresh.FAST,
     ),
     NefitSensorEntityDescription(
         key="hot_water_operation",
         name="Hot water operation",
-        url="/dhwCircuits/dhwA/dhwOperationType",
+        url="/dhwCircuits/{circuit}/dhwOperationType",
+        circuits=HOT_WATER_CIRCUITS,
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSensorEntityDescription(
         key="inhouse_temperature",
@@ -116,6 +262,7 @@ SENSORS: tuple[NefitSensorEntityDescription, ...] = (
         unit=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_temperature,
         entity_registry_enabled_default=False,
     ),
     NefitSensorEntityDescription(
@@ -125,6 +272,7 @@ SENSORS: tuple[NefitSensorEntityDescription, ...] = (
         unit=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
         state_class=SensorStateClass.MEASUREMENT,
+        decode=decode_temperature,
         entity_registry_enabled_default=False,
     ),
 )
@@ -134,13 +282,15 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
         key="hot_water",
         name="Hot water",
         short="DHW",
+        circuits=HOT_WATER_CIRCUITS,
         icon="mdi:water-boiler",
         entity_registry_enabled_default=False,
     ),
     NefitSwitchEntityDescription(
         key="holiday_mode",
         name="Holiday mode",
-        url="/heatingCircuits/hc1/holidayMode/status",
+        url="/heatingCircuits/{circuit}/holidayMode/status",
+        circuits=HEATING_CIRCUITS,
         short="HMD",
         icon="mdi:briefcase-outline",
         entity_registry_enabled_default=False,
@@ -160,6 +310,7 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
         short="DAS",
         icon="mdi:calendar-star",
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSwitchEntityDescription(
         key="tomorrow_as_sunday",
@@ -168,6 +319,7 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
         short="TAS",
         icon="mdi:calendar-star",
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSwitchEntityDescription(
         key="preheating",
@@ -175,6 +327,7 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
         url="/ecus/rrc/userprogram/preheating",
         icon="mdi:calendar-clock",
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSwitchEntityDescription(
         key="home_entrance_detection",
@@ -185,9 +338,11 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
     NefitSwitchEntityDescription(
         key="weather_dependent",
         name="Weather dependent",
-        url="/heatingCircuits/hc1/control",
+        url="/heatingCircuits/{circuit}/control",
+        circuits=HEATING_CIRCUITS,
         icon="mdi:weather-partly-snowy-rainy",
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitSwitchEntityDescription(
         key="lockui",
@@ -195,35 +350,88 @@ SWITCHES: tuple[NefitSwitchEntityDescription, ...] = (
         url="/ecus/rrc/lockuserinterface",
         icon="mdi:lock",
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.STATIC,
     ),
     NefitSwitchEntityDescription(
         key="shower_timer",
         name="Shower timer",
-        url="/dhwCircuits/dhwA/extraDhw/status",
+        url="/dhwCircuits/{circuit}/extraDhw/status",
+        circuits=HOT_WATER_CIRCUITS,
         icon="mdi:timer-cog-outline",
         entity_registry_enabled_default=False,
     ),
 )
 
+# diagnostic sensors of the communication with the Bosch cloud
+STATS_SENSORS: tuple[NefitStatsSensorEntityDescription, ...] = (
+    NefitStatsSensorEntityDescription(
+        key="request_latency",
+        name="Request latency",
+        unit=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: (
+            None if stats.latency.mean is None else round(stats.latency.mean * 1000)
+        ),
+    ),
+    NefitStatsSensorEntityDescription(
+        key="request_timeouts",
+        name="Request timeouts",
+        icon="mdi:timer-alert-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: stats.timeouts,
+    ),
+    NefitStatsSensorEntityDescription(
+        key="reconnects",
+        name="Reconnects",
+        icon="mdi:lan-pending",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: stats.reconnects,
+    ),
+    NefitStatsSensorEntityDescription(
+        key="update_duration",
+        name="Update duration",
+        unit=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: (
+            None if stats.update.mean is None else round(stats.update.mean * 1000)
+        ),
+    ),
+)
+
 NUMBERS: tuple[NefitNumberEntityDescription, ...] = (
     NefitNumberEntityDescription(
         key="shower_timer_duration",
         name="Shower timer duration",
-        url="/dhwCircuits/dhwA/extraDhw/duration",
+        url="/dhwCircuits/{circuit}/extraDhw/duration",
+        circuits=HOT_WATER_CIRCUITS,
         icon="mdi:timer-outline",
         native_min_value=0,
         native_max_value=60,
         native_step=1,
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
     NefitNumberEntityDescription(
         key="temperature_adjustment",
         name="Temperature adjustment",
-        url="/heatingCircuits/hc1/temperatureAdjustment",
+        url="/heatingCircuits/{circuit}/temperatureAdjustment",
+        circuits=HEATING_CIRCUITS,
         icon="mdi:adjust",
         native_min_value=-2,
         native_max_value=2,
         native_step=0.1,
+        decode=decode_float,
         entity_registry_enabled_default=False,
+        refresh=NefitRefresh.SLOW,
     ),
 )
@@ -0,0 +1,35 @@
+"""Conversion of the energy the thermostat reports into a volume of gas."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import CALORIFIC_VALUES, CONF_CALORIFIC_VALUE, CONF_FUEL_TYPE
+from .models import NefitFuelType
+
+
+@dataclass
+class GasConversion:
+    """Converts kWh of gas into m³ with the calorific value of the fuel."""
+
+    fuel_type: NefitFuelType = NefitFuelType.NATURAL_GAS
+    calorific_value: float = CALORIFIC_VALUES[NefitFuelType.NATURAL_GAS]
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> GasConversion:
+        """Return the conversion set in the options of a config entry.
+
+        Without a calorific value, the typical value of the fuel is used.
+        """
+        fuel_type = NefitFuelType(
+            options.get(CONF_FUEL_TYPE, NefitFuelType.NATURAL_GAS)
+        )
+        calorific_value = (
+            options.get(CONF_CALORIFIC_VALUE) or CALORIFIC_VALUES[fuel_type]
+        )
+        return cls(fuel_type, float(calorific_value))
+
+    def volume(self, energy: float) -> float:
+        """Return the m³ of gas that holds an amount of kWh."""
+        return round(energy / self.calorific_value, 1)
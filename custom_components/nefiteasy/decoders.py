@@ -0,0 +1,57 @@
+"""Decoding of the raw values the device sends.
+
+A decoder raises TypeError, ValueError or KeyError for a malformed value.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import Any
+
+DISPLAY_CODES = {
+    "-H": "-H: central heating active",
+    "=H": "=H: hot water active",
+    "0C": "0C: system starting",
+    "0L": "0L: system starting",
+    "0U": "0U: system starting",
+    "0E": "0E: system waiting",
+    "0H": "0H: system standby",
+    "0A": "0A: system waiting (boiler cannot transfer heat to central heating)",
+    "0Y": "0Y: system waiting (boiler cannot transfer heat to central heating)",
+    "2E": "2E: boiler water pressure too low",
+    "H07": "H07: boiler water pressure too low",
+    "2F": "2F: sensors measured abnormal temperature",
+    "2L": "2L: sensors measured abnormal temperature",
+    "2P": "2P: sensors measured abnormal temperature",
+    "2U": "2U: sensors measured abnormal temperature",
+    "4F": "4F: sensors measured abnormal temperature",
+    "4L": "4L: sensors measured abnormal temperature",
+    "6A": "6A: burner doesn't ignite",
+    "6C": "6C: burner doesn't ignite",
+    "rE": "rE: system restarting",
+}
+
+
+def decode_float(value: Any) -> float:
+    """Decode a number."""
+    return float(value)
+
+
+def decode_temperature(value: Any) -> float:
+    """Decode a temperature, in tenths of a degree."""
+    return round(float(value), 1)
+
+
+def decode_display_code(code: Any) -> str:
+    """Decode the display code of the boiler into its description."""
+    if not isinstance(code, str):
+        raise TypeError(f"Display code {code!r} is not a string")
+    return DISPLAY_CODES.get(code, code)
+
+
+def option_decoder(options: Mapping[int, Any]) -> Callable[[Any], str]:
+    """Return a decoder of the index of an option into the option."""
+
+    def decode_option(value: Any) -> str:
+        return str(options[int(value)])
+
+    return decode_option
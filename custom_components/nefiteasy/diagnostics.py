@@ -0,0 +1,48 @@
+"""Diagnostics support for the nefiteasy integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import NefitEasy
+from .const import CONF_ACCESSKEY, CONF_PASSWORD, CONF_SERIAL, DOMAIN
+
+TO_REDACT = {CONF_ACCESSKEY, CONF_PASSWORD, CONF_SERIAL}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    client: NefitEasy = hass.data[DOMAIN][entry.entry_id]["client"]
+
+    # presence profiles are named after the people in the house
+    data = client.data or {}
+    names = {key for key in data if key.endswith("_name")}
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "connection": {
+            "state": client.connected_state,
+            "background_connect": client.background_connect,
+            "update_interval": str(client.update_interval),
+            "last_update_success": client.last_update_success,
+            "last_success": {
+                url: fetched.isoformat()
+                for url, fetched in sorted(client.last_success.items())
+            },
+        },
+        "endpoints": {
+            "firmware": client.firmware,
+            "breakers": client.breakers.as_dict(),
+            "unsupported": sorted(client.unsupported),
+        },
+        "stats": client.stats.as_dict(),
+        "data": async_redact_data(data, names),
+    }
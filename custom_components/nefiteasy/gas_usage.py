@@ -0,0 +1,201 @@
+"""Import of the gas usage history of the thermostat as long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import date, datetime
+import logging
+import math
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import EnergyConverter
+import slixmpp
+
+from .const import (
+    DOMAIN,
+    GAS_USAGE_INTERVAL,
+    GAS_USAGE_PAGE_SIZE,
+    GAS_USAGE_POINTER_URL,
+    GAS_USAGE_URL,
+)
+
+if TYPE_CHECKING:
+    from . import NefitEasy
+
+_LOGGER = logging.getLogger(__name__)
+
+# statistic per field of a gas usage entry
+GAS_USAGE_FIELDS = {"ch": "heating", "hw": "hot_water"}
+
+
+def parse_day(value: Any) -> date | None:
+    """Return the day of a gas usage entry, None for an empty entry.
+
+    Empty entries have the day 255-256-65535.
+    """
+    try:
+        day, month, year = (int(part) for part in str(value).split("-"))
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+class GasUsageImporter:
+    """Import the daily gas usage of a thermostat as external statistics.
+
+    The device keeps its history in pages of GAS_USAGE_PAGE_SIZE days, in a
+    ring buffer that starts again at the first page when it is full. The
+    last imported page and day are stored, so that later imports only read
+    the pages from there on.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: NefitEasy, name: str) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.client = client
+        self._metadata = {
+            field: StatisticMetaData(
+                mean_type=StatisticMeanType.NONE,
+                has_sum=True,
+                name=f"{name} gas usage {kind.replace('_', ' ')}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{client.serial}_gas_usage_{kind}",
+                unit_class=EnergyConverter.UNIT_CLASS,
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            )
+            for field, kind in GAS_USAGE_FIELDS.items()
+        }
+        self._task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_start(self, now: datetime | None = None) -> None:
+        """Start an import in the background, unless one is running."""
+        if self._task is not None and not self._task.done():
+            return
+
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN} gas usage {self.client.serial}"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel a running import."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _async_run(self) -> None:
+        """Import once the connection is verified."""
+        await self.client.async_wait_verified()
+        try:
+            await self.async_import()
+        except (asyncio.TimeoutError, slixmpp.xmlstream.xmlstream.NotConnectedError):
+            _LOGGER.debug("Importing gas usage of %s failed", self.client.serial)
+
+    async def async_import(self) -> None:
+        """Import the entries since the last import.
+
+        The entry of today is not complete, it is imported tomorrow.
+        """
+        checkpoint = self.client.get_stored("gas_usage") or {}
+        page = checkpoint.get("page", 1)
+        last = date.fromisoformat(checkpoint["day"]) if "day" in checkpoint else None
+        sums: dict[str, float] = {
+            field: checkpoint.get("sum", {}).get(kind, 0.0)
+            for field, kind in GAS_USAGE_FIELDS.items()
+        }
+
+        pointer = await self.client.async_get_value(GAS_USAGE_POINTER_URL)
+        last_page = max(1, math.ceil((int(pointer) - 1) / GAS_USAGE_PAGE_SIZE))
+        today = dt_util.now().date()
+
+        if page > last_page:
+            # the ring buffer wrapped since the last import, the pages from the
+            # checkpoint on hold the days before the wrap, up to the first page
+            # of days that were imported before
+            first = page
+            while (
+                day := await self._async_import_page(page, last, sums, today)
+            ) != last or page == first:
+                last = day
+                page += 1
+            page = 1
+
+        for page in range(page, last_page + 1):
+            last = await self._async_import_page(page, last, sums, today)
+
+    async def _async_import_page(
+        self, page: int, last: date | None, sums: dict[str, float], today: date
+    ) -> date | None:
+        """Import the entries of a page after the last imported day.
+
+        Returns the last imported day. The sums are continued in place.
+        """
+        # the device replies with the id of the endpoint, without the page
+        entries = await self.client.async_get_value(
+            f"{GAS_USAGE_URL}?page={page}", reply_id=GAS_USAGE_URL
+        )
+
+        rows: dict[str, list[StatisticData]] = {f: [] for f in GAS_USAGE_FIELDS}
+        for entry in entries:
+            day = parse_day(entry.get("d"))
+            if day is None or day >= today or (last is not None and day <= last):
+                continue
+
+            start = dt_util.start_of_local_day(day)
+            for field in GAS_USAGE_FIELDS:
+                state = float(entry.get(field, 0))
+                sums[field] += state
+                rows[field].append(
+                    StatisticData(start=start, state=state, sum=sums[field])
+                )
+            last = day
+
+        for field, metadata in self._metadata.items():
+            if rows[field]:
+                async_add_external_statistics(self.hass, metadata, rows[field])
+
+        if last is not None:
+            self.client.async_set_stored(
+                "gas_usage",
+                {
+                    "page": page,
+                    "day": last.isoformat(),
+                    "sum": {
+                        kind: sums[field] for field, kind in GAS_USAGE_FIELDS.items()
+                    },
+                },
+            )
+
+        return last
+
+
+@callback
+def async_setup_gas_usage(
+    hass: HomeAssistant, client: NefitEasy, name: str
+) -> Callable[[], None]:
+    """Import the gas usage now and every GAS_USAGE_INTERVAL.
+
+    Returns a callback that stops importing.
+    """
+    importer = GasUsageImporter(hass, client, name)
+    importer.async_start()
+    remove_interval = async_track_time_interval(
+        hass, importer.async_start, GAS_USAGE_INTERVAL
+    )
+
+    @callback
+    def async_stop() -> None:
+        remove_interval()
+        importer.async_stop()
+
+    return async_stop
@@ -1,14 +1,44 @@
 """Models for the nefiteasy integration."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from enum import IntEnum, StrEnum
+from typing import TYPE_CHECKING, Any, Self
 
 from homeassistant.components.number import NumberEntityDescription
 from homeassistant.components.select import SelectEntityDescription
 from homeassistant.components.sensor import SensorEntityDescription
 from homeassistant.components.switch import SwitchEntityDescription
 from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.typing import StateType
+
+if TYPE_CHECKING:
+    from .stats import NefitStats
+
+
+class NefitRefresh(StrEnum):
+    """How often the endpoint of an entity is refreshed."""
+
+    FAST = "fast"
+    NORMAL = "normal"
+    SLOW = "slow"
+    STATIC = "static"
+
+
+class NefitPriority(IntEnum):
+    """Priority of a request, lower values are sent first."""
+
+    INTERACTIVE = 0  # writes of the user and their read-backs
+    NORMAL = 1
+    BACKGROUND = 2  # polls
+
+
+class NefitFuelType(StrEnum):
+    """Fuel the boiler burns."""
+
+    NATURAL_GAS = "natural_gas"
+    LPG = "lpg"
 
 
 @dataclass
@@ -16,8 +46,42 @@ class NefitEntityDescription(EntityDescription):
     """Represents an nefiteasy entity."""
 
     url: str | None = None
+    # key of the value in the coordinator data, when it differs from the key
+    data_key: str | None = None
+    # decoder of the raw value into the value that is stored, see decoders.py
+    decode: Callable[[Any], Any] | None = None
     short: str | None = None
     unit: str | None = None
+    refresh: NefitRefresh = NefitRefresh.NORMAL
+    # directory of the circuits a template is repeated for, the url of a
+    # template has a {circuit} placeholder
+    circuits: str | None = None
+    circuit: str | None = None  # circuit of a repeated entity
+
+    def for_circuit(self, circuit: str, first: bool) -> Self | None:
+        """Return the description of a template for a circuit.
+
+        The first circuit keeps the key and the uiStatus field of the
+        template, uiStatus only has the values of the first circuit. Other
+        circuits get their own key and are read from their endpoints, None
+        is returned if there is no endpoint to read.
+        """
+        url = None if self.url is None else self.url.format(circuit=circuit)
+        if first:
+            return replace(self, url=url, circuits=None, circuit=circuit)
+        if url is None:
+            return None
+
+        return replace(
+            self,
+            key=f"{self.key}_{circuit}",
+            name=f"{self.name} {circuit}",
+            url=url,
+            data_key=None if self.data_key is None else f"{self.data_key}_{circuit}",
+            short=None,
+            circuits=None,
+            circuit=circuit,
+        )
 
 
 @dataclass
@@ -37,6 +101,20 @@ class NefitSensorEntityDescription(NefitEntityDescription, SensorEntityDescripti
     """Represents a nefiteasy Sensor."""
 
 
+@dataclass
+class NefitGasSensorEntityDescription(NefitSensorEntityDescription):
+    """Represents a nefiteasy Sensor of gas consumption, reported in kWh."""
+
+    volume: bool = False  # report the volume of the gas instead
+
+
+@dataclass
+class NefitStatsSensorEntityDescription(NefitSensorEntityDescription):
+    """Represents a nefiteasy Sensor of the communication statistics."""
+
+    value_fn: Callable[[NefitStats], StateType] | None = None
+
+
 @dataclass
 class NefitNumberEntityDescription(NefitEntityDescription, NumberEntityDescription):
     """Represents a nefiteasy Number."""
@@ -2,20 +2,96 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
 import logging
 from types import MappingProxyType
 from typing import Any
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import NefitEasy
-from .const import CONF_NAME, CONF_SERIAL, DOMAIN
+from .const import ATTR_CACHED_AT, CONF_NAME, CONF_SERIAL, DOMAIN, SIGNAL_CAPABILITIES
 from .models import NefitEntityDescription
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class NefitEntity(CoordinatorEntity):
+@callback
+def async_add_supported_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    client: NefitEasy,
+    descriptions: Iterable[NefitEntityDescription],
+    create: Callable[[Any], NefitEntity],
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add the entities the device supports.
+
+    Templates are repeated for every circuit of the device. Entities the
+    device turns out to support later, e.g. after a firmware update, are
+    added when its endpoints are probed again.
+    """
+    added: set[str] = set()
+
+    @callback
+    def async_add_supported() -> None:
+        entities = []
+        for description in client.expand(descriptions):
+            if description.key not in added and client.supports(description):
+                added.add(description.key)
+                entities.append(create(description))
+
+        if entities:
+            async_add_entities(entities, True)
+
+    async_add_supported()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_CAPABILITIES.format(client.serial), async_add_supported
+        )
+    )
+
+
+class NefitCoordinatorEntity(CoordinatorEntity):
+    """Coordinator entity that is only written when its data changed."""
+
+    coordinator: NefitEasy
+
+    # keys in the coordinator data the state of the entity depends on
+    _data_keys: frozenset[str] = frozenset()
+    _written_available: bool | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        available = self.available
+        if available == self._written_available and not self.coordinator.has_changed(
+            self._data_keys
+        ):
+            return
+
+        self._written_available = available
+        super()._handle_coordinator_update()
+
+    @property
+    def available(self) -> bool:
+        """Return whether the values of the entity are known."""
+        return self.coordinator.is_available(self._data_keys)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return when the state was saved, while it is restored from the last run."""
+        if (cached_at := self.coordinator.cached_at(self._data_keys)) is None:
+            return None
+
+        return {ATTR_CACHED_AT: cached_at}
+
+
+class NefitEntity(NefitCoordinatorEntity):
     """Representation of a Nefit entity."""
 
     entity_description: NefitEntityDescription
@@ -30,6 +106,9 @@ class NefitEntity(CoordinatorEntity):
         super().__init__(client)
 
         self.entity_description = entity_description
+        self._data_keys = frozenset(
+            (entity_description.data_key or entity_description.key,)
+        )
 
         self._client = client
         self._config = data
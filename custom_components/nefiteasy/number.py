@@ -13,7 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from . import NefitEasy
 from .const import DOMAIN, NUMBERS
 from .models import NefitNumberEntityDescription
-from .nefit_entity import NefitEntity
+from .nefit_entity import NefitEntity, async_add_supported_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,15 +24,17 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Switch setup for nefit easy."""
-    entities: list[NefitEntity] = []
-
     client = hass.data[DOMAIN][config_entry.entry_id]["client"]
     data = config_entry.data
 
-    for description in NUMBERS:
-        entities.append(NefitNumber(description, client, data))
-
-    async_add_entities(entities, True)
+    async_add_supported_entities(
+        hass,
+        config_entry,
+        client,
+        NUMBERS,
+        lambda description: NefitNumber(description, client, data),
+        async_add_entities,
+    )
 
 
 class NefitNumber(NefitEntity, NumberEntity):
@@ -63,4 +65,6 @@ class NefitNumber(NefitEntity, NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
-        self._client.nefit.put_value(self.get_endpoint(), value)
+        await self._client.async_put_value(
+            self.get_endpoint(), self.entity_description.key, value
+        )
@@ -0,0 +1,131 @@
+"""Correlation of requests to the Bosch cloud with their replies."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+
+class PendingEndpoint:
+    """Outstanding requests for a single endpoint id.
+
+    The device answers the requests for an endpoint in the order they were
+    sent, so every request gets a sequence number and a waiter is only woken
+    by the reply with its own (or a later) sequence number.
+    """
+
+    __slots__ = ("sent", "received", "waiters")
+
+    def __init__(self) -> None:
+        """Initialize the endpoint."""
+        self.sent = 0
+        self.received = 0
+        self.waiters: list[tuple[int, asyncio.Future[Any]]] = []
+
+
+class PendingRequests:
+    """Registry of outstanding requests keyed by endpoint id."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._endpoints: dict[str, PendingEndpoint] = {}
+        self._lost: dict[str, int] = {}  # requests given up per endpoint
+
+    def add(
+        self, endpoint: str, fresh: bool = False
+    ) -> tuple[asyncio.Future[Any], bool]:
+        """Register a waiter for the next reply of an endpoint.
+
+        Returns the future of the waiter and whether a request has to be sent
+        for it. Unless fresh is set, a waiter joins a request that is already
+        in flight for the endpoint.
+        """
+        pending = self._endpoints.get(endpoint)
+        if pending is None:
+            pending = self._endpoints[endpoint] = PendingEndpoint()
+
+        send = fresh or pending.sent == pending.received
+        if send:
+            pending.sent += 1
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        pending.waiters.append((pending.sent, future))
+        return future, send
+
+    def in_flight(self, endpoint: str) -> bool:
+        """Return whether a request for an endpoint waits for its reply."""
+        pending = self._endpoints.get(endpoint)
+        return pending is not None and pending.sent != pending.received
+
+    def discard(
+        self, endpoint: str, future: asyncio.Future[Any], sent: bool = True
+    ) -> None:
+        """Remove a waiter, after it was woken, timed out or cancelled.
+
+        A request that could not be sent is taken back, no reply will come
+        for it. It is sent right after it was added, so it is the last one.
+        """
+        pending = self._endpoints.get(endpoint)
+        if pending is None:
+            return
+
+        for item in pending.waiters:
+            if item[1] is future:
+                pending.waiters.remove(item)
+                if not sent:
+                    if item[0] == pending.sent:
+                        pending.sent -= 1
+                elif not future.done() or future.cancelled():
+                    # consider the request lost if nobody else waits for it,
+                    # so that a late reply is not taken for a newer request
+                    seq = item[0]
+                    if seq > pending.received and not any(
+                        other <= seq for other, _ in pending.waiters
+                    ):
+                        self._lost[endpoint] = (
+                            self._lost.get(endpoint, 0) + seq - pending.received
+                        )
+                        pending.received = seq
+                break
+
+        if not pending.waiters:
+            del self._endpoints[endpoint]
+
+    def resolve(self, endpoint: str, value: Any) -> bool:
+        """Wake the waiters answered by a reply.
+
+        Returns False for a reply nobody is waiting for. A late reply must be
+        taken out with late first, it is not the reply of a newer request.
+        """
+        pending = self._endpoints.get(endpoint)
+        if pending is None or pending.sent == pending.received:
+            return False
+
+        pending.received += 1
+        for seq, future in pending.waiters:
+            if seq <= pending.received and not future.done():
+                future.set_result(value)
+
+        return True
+
+    def late(self, endpoint: str) -> bool:
+        """Return whether a reply answers a request given up.
+
+        The device answers in order, so the replies of requests given up come
+        before the replies of the requests sent after them.
+        """
+        if not (lost := self._lost.get(endpoint)):
+            return False
+
+        if lost == 1:
+            del self._lost[endpoint]
+        else:
+            self._lost[endpoint] = lost - 1
+        return True
+
+    def cancel_all(self) -> None:
+        """Cancel all waiters."""
+        for pending in self._endpoints.values():
+            for _, future in pending.waiters:
+                future.cancel()
+        self._endpoints.clear()
+        self._lost.clear()
@@ -0,0 +1,56 @@
+"""Scheduling of the requests to the Bosch cloud by priority."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+
+from .models import NefitPriority
+
+
+class RequestScheduler:
+    """Slots for requests in flight, handed out by priority.
+
+    At most limit requests are in flight at a time. A queued request of a
+    higher priority gets the next free slot before requests of a lower
+    priority, requests of the same priority are sent in order. A request in
+    flight is never interrupted.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the scheduler."""
+        self._limit = limit
+        self._in_flight = 0
+        self._order = itertools.count()
+        self._queue: list[tuple[NefitPriority, int, asyncio.Future[None]]] = []
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    async def acquire(self, priority: NefitPriority) -> None:
+        """Wait for a slot, release it with release."""
+        if self._in_flight < self._limit:
+            self._in_flight += 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just before the cancellation
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Hand the slot of a request to the next queued request."""
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._in_flight -= 1
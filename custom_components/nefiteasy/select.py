@@ -13,7 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from . import NefitEasy
 from .const import DOMAIN, SELECTS
 from .models import NefitSelectEntityDescription
-from .nefit_entity import NefitEntity
+from .nefit_entity import NefitEntity, async_add_supported_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,15 +24,17 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Switch setup for nefit easy."""
-    entities: list[NefitEntity] = []
-
     client = hass.data[DOMAIN][config_entry.entry_id]["client"]
     data = config_entry.data
 
-    for description in SELECTS:
-        entities.append(NefitSelect(description, client, data))
-
-    async_add_entities(entities, True)
+    async_add_supported_entities(
+        hass,
+        config_entry,
+        client,
+        SELECTS,
+        lambda description: NefitSelect(description, client, data),
+        async_add_entities,
+    )
 
 
 class NefitSelect(NefitEntity, SelectEntity):
@@ -55,14 +57,13 @@ class NefitSelect(NefitEntity, SelectEntity):
     @property
     def current_option(self) -> str | None:
         """Return the state of the entity."""
-        option = self.coordinator.data.get(self.entity_description.key)
-        if option is not None and self.entity_description.options is not None:
-            return str(self.entity_description.options[option])
-        return None
+        return self.coordinator.data.get(self.entity_description.key)
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         option_dict = self.entity_description.options
         if option_dict is not None:
             value = list(option_dict.keys())[list(option_dict.values()).index(option)]
-            self._client.nefit.put_value(self.get_endpoint(), value)
+            await self._client.async_put_value(
+                self.get_endpoint(), self.entity_description.key, value
+            )
@@ -1,18 +1,25 @@
 """Support for Bosch home thermostats."""
 from __future__ import annotations
 
-from contextlib import suppress
 import logging
+from types import MappingProxyType
+from typing import Any
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 
-from .const import DOMAIN, SENSORS
-from .models import NefitSensorEntityDescription
-from .nefit_entity import NefitEntity
+from . import NefitEasy
+from .const import DOMAIN, SENSORS, STATS_SENSORS
+from .conversion import GasConversion
+from .models import (
+    NefitGasSensorEntityDescription,
+    NefitSensorEntityDescription,
+    NefitStatsSensorEntityDescription,
+)
+from .nefit_entity import NefitEntity, async_add_supported_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,20 +30,23 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Sensor platform setup for nefit easy."""
-    entities: list[NefitEntity] = []
-
     client = hass.data[DOMAIN][config_entry.entry_id]["client"]
     data = config_entry.data
+    conversion = GasConversion.from_options(config_entry.options)
 
-    for description in SENSORS:
-        if description.key == "status":
-            entities.append(NefitStatus(description, client, data))
-        elif description.key == "year_total":
-            entities.append(NefitYearTotal(description, client, data))
-        else:
-            entities.append(NefitSensor(description, client, data))
+    def create(description: NefitSensorEntityDescription) -> NefitEntity:
+        if isinstance(description, NefitGasSensorEntityDescription):
+            return NefitGasSensor(description, client, data, conversion)
+        return NefitSensor(description, client, data)
+
+    async_add_supported_entities(
+        hass, config_entry, client, SENSORS, create, async_add_entities
+    )
 
-    async_add_entities(entities, True)
+    async_add_entities(
+        [NefitStatsSensor(description, client, data) for description in STATS_SENSORS],
+        True,
+    )
 
 
 class NefitSensor(NefitEntity, SensorEntity):
@@ -46,17 +56,8 @@ class NefitSensor(NefitEntity, SensorEntity):
 
     @property
     def native_value(self) -> StateType:
-        # def state(self) -> Any:
         """Return the state/value of the sensor."""
-        value = self.coordinator.data.get(self.entity_description.key)
-        if value is None:
-            return value
-
-        with suppress(TypeError):
-            if self.device_class == SensorDeviceClass.TEMPERATURE:
-                return round(float(value), 1)
-
-        return value
+        return self.coordinator.data.get(self.entity_description.key)
 
     @property
     def native_unit_of_measurement(self) -> str | None:
@@ -64,57 +65,63 @@ class NefitSensor(NefitEntity, SensorEntity):
         return self.entity_description.unit
 
 
-class NefitYearTotal(NefitSensor):
-    """Representation of the total year consumption."""
+class NefitGasSensor(NefitSensor):
+    """Representation of the gas consumed this year, as energy or volume."""
+
+    entity_description: NefitGasSensorEntityDescription
+
+    def __init__(
+        self,
+        entity_description: NefitGasSensorEntityDescription,
+        client: NefitEasy,
+        data: MappingProxyType[str, Any],
+        conversion: GasConversion,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(entity_description, client, data)
+        self._conversion = conversion
+        self._data_key = entity_description.data_key or entity_description.key
+
+    async def async_added_to_hass(self) -> None:
+        """Convert the restored value."""
+        self._update_value()
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Convert the value once when it changed."""
+        if self.coordinator.has_changed(self._data_keys):
+            self._update_value()
+        super()._handle_coordinator_update()
+
+    def _update_value(self) -> None:
+        """Convert the kWh reported by the device."""
+        energy = (self.coordinator.data or {}).get(self._data_key)
+        if energy is None:
+            self._attr_native_value = None
+        elif self.entity_description.volume:
+            self._attr_native_value = self._conversion.volume(energy)
+        else:
+            self._attr_native_value = energy
 
     @property
     def native_value(self) -> StateType:
-        # def state(self) -> str | None:
         """Return the state/value of the sensor."""
-        data = self.coordinator.data.get(self.entity_description.key)
+        return self._attr_native_value
 
-        if data is None:
-            return None
 
-        return "{:.1f}".format(
-            data * 0.12307692
-        )  # convert kWh to m3, for LPG, multiply with 0.040742416
+class NefitStatsSensor(NefitSensor):
+    """Representation of a statistic of the communication with the device."""
 
+    entity_description: NefitStatsSensorEntityDescription
 
-class NefitStatus(NefitSensor):
-    """Representation of the boiler status."""
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state after every update, the statistics change with it."""
+        self.async_write_ha_state()
 
     @property
     def native_value(self) -> StateType:
         """Return the state/value of the sensor."""
-        return get_status(self.coordinator.data.get(self.entity_description.key))
-
-
-def get_status(code: str) -> str:
-    """Return status of sensor."""
-    display_codes = {
-        "-H": "-H: central heating active",
-        "=H": "=H: hot water active",
-        "0C": "0C: system starting",
-        "0L": "0L: system starting",
-        "0U": "0U: system starting",
-        "0E": "0E: system waiting",
-        "0H": "0H: system standby",
-        "0A": "0A: system waiting (boiler cannot transfer heat to central heating)",
-        "0Y": "0Y: system waiting (boiler cannot transfer heat to central heating)",
-        "2E": "2E: boiler water pressure too low",
-        "H07": "H07: boiler water pressure too low",
-        "2F": "2F: sensors measured abnormal temperature",
-        "2L": "2L: sensors measured abnormal temperature",
-        "2P": "2P: sensors measured abnormal temperature",
-        "2U": "2U: sensors measured abnormal temperature",
-        "4F": "4F: sensors measured abnormal temperature",
-        "4L": "4L: sensors measured abnormal temperature",
-        "6A": "6A: burner doesn't ignite",
-        "6C": "6C: burner doesn't ignite",
-        "rE": "rE: system restarting",
-    }
-    if code in display_codes:
-        return display_codes[code]
-
-    return code
+        assert self.entity_description.value_fn is not None
+        return self.entity_description.value_fn(self.coordinator.stats)
@@ -0,0 +1,120 @@
+"""Statistics of the communication with the Bosch cloud."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+from .const import LATENCY_BUCKETS
+from .models import NefitPriority
+
+
+class Timing:
+    """Count, total and maximum of a duration, in seconds."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the timing."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Add a measured duration."""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration, if any was measured."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timing as a dict."""
+        return {"count": self.count, "mean": self.mean, "max": self.max}
+
+
+class EndpointStats:
+    """Requests of an endpoint and the latency of their replies."""
+
+    __slots__ = ("requests", "timeouts", "latency", "histogram")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.requests = 0
+        self.timeouts = 0
+        self.latency = Timing()
+        # replies per bucket of LATENCY_BUCKETS, the last one counts the rest
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "latency": self.latency.as_dict(),
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "inf"], self.histogram)),
+        }
+
+
+class NefitStats:
+    """Statistics of a thermostat, kept in memory since the start."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.latency = Timing()
+        self.timeouts = 0
+        self.late_replies = 0  # replies to requests that timed out
+        self.unsolicited = 0  # messages that are not a reply to a request
+        self.malformed = 0  # values that could not be decoded
+        self.reconnects = 0
+        self.connect_attempts = 0
+        self.lock_wait = Timing()
+        self.update = Timing()
+        # time requests waited for a slot, per priority
+        self.queue_wait = {priority: Timing() for priority in NefitPriority}
+
+    def _endpoint(self, url: str) -> EndpointStats:
+        """Return the statistics of an endpoint."""
+        if (stats := self.endpoints.get(url)) is None:
+            stats = self.endpoints[url] = EndpointStats()
+        return stats
+
+    def request(self, url: str) -> None:
+        """Count a request that is sent."""
+        self._endpoint(url).requests += 1
+
+    def reply(self, url: str, seconds: float) -> None:
+        """Count the reply to a request."""
+        stats = self._endpoint(url)
+        stats.latency.add(seconds)
+        stats.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency.add(seconds)
+
+    def timeout(self, url: str) -> None:
+        """Count a request without a reply in time."""
+        self._endpoint(url).timeouts += 1
+        self.timeouts += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "latency": self.latency.as_dict(),
+            "timeouts": self.timeouts,
+            "late_replies": self.late_replies,
+            "unsolicited": self.unsolicited,
+            "malformed": self.malformed,
+            "reconnects": self.reconnects,
+            "connect_attempts": self.connect_attempts,
+            "lock_wait": self.lock_wait.as_dict(),
+            "update": self.update.as_dict(),
+            "queue_wait": {
+                priority.name.lower(): timing.as_dict()
+                for priority, timing in self.queue_wait.items()
+            },
+            "endpoints": {
+                url: stats.as_dict() for url, stats in sorted(self.endpoints.items())
+            },
+        }
@@ -0,0 +1,142 @@
+"""State of a thermostat, as the values of its keys."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+import sys
+import time
+from typing import Any
+
+
+class StateEntry:
+    """The value of a key, when it was received and when it last changed.
+
+    received is None for a value restored from the last run.
+    """
+
+    __slots__ = ("value", "received", "version")
+
+    def __init__(self, value: Any, received: float | None, version: int) -> None:
+        """Initialize the entry."""
+        self.value = value
+        self.received = received
+        self.version = version
+
+
+class StateStore(Mapping[str, Any]):
+    """Values of a thermostat, keyed by an interned index per key.
+
+    The store is a read-only mapping of the values for the entities. Every
+    change bumps the version of the store and gives the entry of the changed
+    key that version. The indexes of the keys are kept in the order they last
+    changed, so the keys changed since a version are found without a scan.
+    """
+
+    __slots__ = ("_index", "_keys", "_entries", "_recent", "version")
+
+    def __init__(self) -> None:
+        """Initialize the store."""
+        self._index: dict[str, int] = {}
+        self._keys: list[str] = []
+        self._entries: list[StateEntry] = []
+        self._recent: dict[int, None] = {}  # indexes, last changed last
+        self.version = 0
+
+    def index(self, key: str) -> int:
+        """Return the index of a key, add the key if it is new."""
+        if (index := self._index.get(key)) is None:
+            index = self._index[key] = len(self._keys)
+            self._keys.append(sys.intern(key))
+            self._entries.append(StateEntry(None, None, 0))
+        return index
+
+    def key(self, index: int) -> str:
+        """Return the key of an index."""
+        return self._keys[index]
+
+    def entry(self, key: str) -> StateEntry | None:
+        """Return the entry of a key, if the key is known."""
+        if (index := self._index.get(key)) is None:
+            return None
+        return self._entries[index]
+
+    def set(self, index: int, value: Any) -> bool:
+        """Store a received value by the index of its key.
+
+        Returns whether the value changed. A value that replaces a restored
+        value always counts as changed.
+        """
+        entry = self._entries[index]
+        changed = entry.version == 0 or entry.received is None or entry.value != value
+        entry.received = time.time()
+        if changed:
+            self._bump(index, entry)
+            entry.value = value
+        return changed
+
+    def _bump(self, index: int, entry: StateEntry) -> None:
+        """Give an entry the next version of the store."""
+        self.version += 1
+        entry.version = self.version
+        self._recent.pop(index, None)
+        self._recent[index] = None
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Store the values saved by the last run."""
+        for key, value in data.items():
+            index = self.index(key)
+            entry = self._entries[index]
+            self._bump(index, entry)
+            entry.value = value
+            entry.received = None
+
+    def restored(self, keys: Iterable[str] | None = None) -> bool:
+        """Return whether any of the keys, or of all keys, has a restored value."""
+        if keys is None:
+            return any(
+                entry.version and entry.received is None for entry in self._entries
+            )
+        return any(
+            (entry := self.entry(key)) is not None
+            and entry.version
+            and entry.received is None
+            for key in keys
+        )
+
+    def changed_since(self, version: int) -> frozenset[str]:
+        """Return the keys that changed after a version of the store."""
+        changed = []
+        for index in reversed(self._recent):
+            if self._entries[index].version <= version:
+                break
+            changed.append(self._keys[index])
+        return frozenset(changed)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a copy of the values."""
+        return {
+            key: entry.value
+            for key, entry in zip(self._keys, self._entries)
+            if entry.version
+        }
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of a key."""
+        if (index := self._index.get(key)) is None:
+            return default
+        entry = self._entries[index]
+        return entry.value if entry.version else default
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the value of a key."""
+        entry = self.entry(key)
+        if entry is None or not entry.version:
+            raise KeyError(key)
+        return entry.value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys with a value."""
+        return (key for key, entry in zip(self._keys, self._entries) if entry.version)
+
+    def __len__(self) -> int:
+        """Return the number of keys with a value."""
+        return sum(1 for entry in self._entries if entry.version)
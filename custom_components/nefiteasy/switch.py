@@ -11,9 +11,15 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import NefitEasy
-from .const import DOMAIN, SWITCHES
+from .const import (
+    DOMAIN,
+    HOT_WATER_CIRCUITS,
+    PRESENCE_URL,
+    STATE_CONNECTION_VERIFIED,
+    SWITCHES,
+)
 from .models import NefitSwitchEntityDescription
-from .nefit_entity import NefitEntity
+from .nefit_entity import NefitEntity, async_add_supported_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,49 +35,96 @@ async def async_setup_entry(
     client = hass.data[DOMAIN][config_entry.entry_id]["client"]
     data = config_entry.data
 
-    for description in SWITCHES:
+    def create(description: NefitSwitchEntityDescription) -> NefitEntity:
         if description.key == "hot_water":
-            entities.append(NefitHotWater(description, client, data))
-        elif description.key == "lockui":
-            entities.append(NefitSwitch(description, client, data, "true", "false"))
-        elif description.key == "weather_dependent":
-            entities.append(NefitSwitch(description, client, data, "weather", "room"))
-        elif description.key == "home_entrance_detection":
+            return NefitHotWater(description, client, data)
+        if description.key == "lockui":
+            return NefitSwitch(description, client, data, "true", "false")
+        if description.key == "weather_dependent":
+            return NefitSwitch(description, client, data, "weather", "room")
+        return NefitSwitch(description, client, data)
+
+    async_add_supported_entities(
+        hass,
+        config_entry,
+        client,
+        [
+            description
+            for description in SWITCHES
+            if description.key != "home_entrance_detection"
+        ],
+        create,
+        async_add_entities,
+    )
+
+    for description in SWITCHES:
+        if description.key == "home_entrance_detection" and client.has_endpoint(
+            PRESENCE_URL
+        ):
             await setup_home_entrance_detection(
+                hass,
+                config_entry,
+                async_add_entities,
                 entities,
                 client,
                 data,
-                description.key,
                 description.name,
                 description.icon,
             )
-        else:
-            entities.append(NefitSwitch(description, client, data))
 
     async_add_entities(entities, True)
 
 
 async def setup_home_entrance_detection(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
     entities: list[NefitEntity],
     client: NefitEasy,
     data: MappingProxyType[str, Any],
-    basekey: str,
     basename: str,
     baseicon: str,
 ) -> None:
-    """Home entrance detection setup."""
-    for i in range(0, 10):
-        endpoint = "/ecus/rrc/homeentrancedetection"
-        name = await client.async_init_presence(endpoint, i)
-
-        if name is not None:
-            description = NefitSwitchEntityDescription(
-                key=f"presence{i}_detected",
-                name=basename.format(name),
-                url=f"{endpoint}/userprofile{i}/detected",
-                icon=baseicon,
-            )
-            entities.append(NefitSwitch(description, client, data))
+    """Home entrance detection setup.
+
+    Profiles found on an earlier start are restored right away and validated
+    in the background, new profiles are added when found. Without a
+    connection yet, discovery waits in the background for the connection.
+    """
+    endpoint = PRESENCE_URL
+
+    def presence_switch(index: int, name: str) -> NefitSwitch:
+        description = NefitSwitchEntityDescription(
+            key=f"presence{index}_detected",
+            name=basename.format(name),
+            url=f"{endpoint}/userprofile{index}/detected",
+            icon=baseicon,
+        )
+        return NefitSwitch(description, client, data)
+
+    async def validate_profiles(known: dict[int, str]) -> None:
+        await client.async_wait_verified()
+        profiles = await client.async_discover_presence(endpoint)
+        async_add_entities(
+            [
+                presence_switch(index, name)
+                for index, name in profiles.items()
+                if index not in known
+            ],
+            True,
+        )
+
+    profiles = client.presence_profiles
+    if profiles is None and client.connected_state == STATE_CONNECTION_VERIFIED:
+        profiles = await client.async_discover_presence(endpoint)
+    else:
+        profiles = profiles or {}
+        config_entry.async_create_background_task(
+            hass, validate_profiles(profiles), "nefiteasy presence discovery"
+        )
+
+    for index, name in profiles.items():
+        entities.append(presence_switch(index, name))
 
 
 class NefitSwitch(NefitEntity, SwitchEntity):
@@ -107,9 +160,9 @@ class NefitSwitch(NefitEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
-        self._client.nefit.put_value(self.get_endpoint(), self._on_value)
-
-        self._client.nefit.get(self.get_endpoint())
+        await self._client.async_put_value(
+            self.get_endpoint(), self.entity_description.key, self._on_value
+        )
 
         _LOGGER.debug(
             "Switch Nefit %s to %s, endpoint=%s.",
@@ -120,9 +173,9 @@ class NefitSwitch(NefitEntity, SwitchEntity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
-        self._client.nefit.put_value(self.get_endpoint(), self._off_value)
-
-        self._client.nefit.get(self.get_endpoint())
+        await self._client.async_put_value(
+            self.get_endpoint(), self.entity_description.key, self._off_value
+        )
 
         _LOGGER.debug(
             "Switch Nefit %s to %s, endpoint=%s.",
@@ -135,6 +188,17 @@ class NefitSwitch(NefitEntity, SwitchEntity):
 class NefitHotWater(NefitSwitch):
     """Class for nefit hot water entity."""
 
+    def __init__(
+        self,
+        entity_description: NefitSwitchEntityDescription,
+        client: NefitEasy,
+        data: MappingProxyType[str, Any],
+    ) -> None:
+        """Init Nefit hot water switch."""
+        super().__init__(entity_description, client, data)
+
+        self._data_keys = frozenset((entity_description.key, "user_mode"))
+
     def get_endpoint(self) -> str:
         """Get end point."""
         endpoint = (
@@ -142,4 +206,4 @@ class NefitHotWater(NefitSwitch):
             if self.coordinator.data.get("user_mode") == "clock"
             else "dhwOperationManualMode"
         )
-        return "/dhwCircuits/dhwA/" + endpoint
+        return f"{HOT_WATER_CIRCUITS}/{self.entity_description.circuit}/{endpoint}"
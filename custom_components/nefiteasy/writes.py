@@ -0,0 +1,72 @@
+"""Queue of writes to the device that are sent together."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+class PendingWrite:
+    """The latest write to an endpoint and the callers waiting for it."""
+
+    __slots__ = ("send", "readback", "updates", "previous", "futures")
+
+    def __init__(self, readback: str) -> None:
+        """Initialize the write."""
+        self.send: Callable[[], None] | None = None
+        self.readback = readback
+        self.updates: dict[str, Any] = {}
+        self.previous: dict[str, Any] = {}  # values to restore on failure
+        self.futures: list[asyncio.Future[None]] = []
+
+
+class WriteQueue:
+    """Writes keyed by endpoint, in the order they were first queued.
+
+    A write to an endpoint that is already queued replaces the value that
+    will be sent, so only the latest value of a burst reaches the device.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the queue."""
+        self._writes: dict[str, PendingWrite] = {}
+
+    def __len__(self) -> int:
+        """Return the number of queued writes."""
+        return len(self._writes)
+
+    def add(
+        self,
+        endpoint: str,
+        send: Callable[[], None],
+        readback: str,
+        updates: dict[str, Any],
+        data: Mapping[str, Any],
+    ) -> asyncio.Future[None]:
+        """Queue a write and return a future that is done when it is confirmed."""
+        write = self._writes.get(endpoint)
+        if write is None:
+            write = self._writes[endpoint] = PendingWrite(readback)
+
+        write.send = send
+        write.readback = readback
+        for key, value in updates.items():
+            # restore the value from before the first write of the burst
+            write.previous.setdefault(key, data.get(key))
+            write.updates[key] = value
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        write.futures.append(future)
+        return future
+
+    def pop_all(self) -> list[PendingWrite]:
+        """Remove and return the queued writes, in order."""
+        writes = list(self._writes.values())
+        self._writes.clear()
+        return writes
+
+    def cancel_all(self) -> None:
+        """Cancel all callers waiting for a write."""
+        for write in self.pop_all():
+            for future in write.futures:
+                future.cancel()
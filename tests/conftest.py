@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 from homeassistant.helpers import entity_registry as er
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry, load_fixture
+import slixmpp
 
 from custom_components.nefiteasy.const import SWITCHES
 
@@ -105,18 +106,19 @@ async def nefit_number_wrapper(nefit_config, hass):
 
 
 @pytest.fixture
-@patch("custom_components.nefiteasy.NefitCore")
-async def nefit_wrapper(nefit_mock, hass, nefit_config):
+async def nefit_wrapper(hass, nefit_config):
     """Setups a nefiteasy wrapper with mocked device."""
     config_entry = nefit_config
 
-    client = ClientMock(nefit_mock)
-    nefit_mock.return_value = client
+    # a reload of the entry connects to the same mocked device
+    with patch("custom_components.nefiteasy.NefitCore") as nefit_mock:
+        client = ClientMock(nefit_mock)
+        nefit_mock.return_value = client
 
-    await hass.config_entries.async_setup(config_entry.entry_id)
-    await hass.async_block_till_done()
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
 
-    return client
+        yield client
 
 
 @pytest.fixture
@@ -195,8 +197,15 @@ class ClientMock:
 
         self.failed_auth_handler = None
 
+        self.requested: list[str] = []  # paths in the order they were requested
+        self.failing: set[str] = set()  # paths that fail to be sent
+
     def get(self, path):
         """Get data."""
+        self.requested.append(path)
+        if path in self.failing:
+            raise slixmpp.xmlstream.xmlstream.NotConnectedError
+
         if path in self.data:
             loop = asyncio.get_event_loop()
             if self.callback is not None:
@@ -209,8 +218,9 @@ class ClientMock:
         """Connect."""
         self.xmppclient.connected_event.set()
 
-        self.serial_number = self.mock.call_args_list[0][1]["serial_number"]
-        self.callback = self.mock.call_args_list[0][1].get("message_callback")
+        # the client of the last setup of the entry
+        self.serial_number = self.mock.call_args[1]["serial_number"]
+        self.callback = self.mock.call_args[1].get("message_callback")
 
         return
 
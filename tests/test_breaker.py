@@ -0,0 +1,38 @@
+"""Tests of the nefiteasy circuit breakers."""
+from homeassistant.util import dt as dt_util
+
+from custom_components.nefiteasy.breaker import EndpointBreakers
+from custom_components.nefiteasy.const import (
+    BREAKER_BACKOFF,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_THRESHOLD,
+)
+
+
+def test_breaker_backoff():
+    """Test a failing endpoint is skipped with a growing backoff."""
+    breakers = EndpointBreakers()
+    url = "/heatingCircuits/hc1/temperatureAdjustment"
+    now = dt_util.utcnow()
+
+    for _ in range(BREAKER_THRESHOLD - 1):
+        assert not breakers.failure(url, now)
+        assert breakers.allow(url, now)
+
+    assert breakers.failure(url, now)
+    assert not breakers.allow(url, now)
+    assert breakers.allow(url, now + BREAKER_BACKOFF)
+
+    # a failed probe doubles the backoff
+    now += BREAKER_BACKOFF
+    assert breakers.failure(url, now)
+    assert not breakers.allow(url, now + BREAKER_BACKOFF)
+    assert breakers.allow(url, now + 2 * BREAKER_BACKOFF)
+
+    for _ in range(10):
+        breakers.failure(url, now)
+    assert breakers.allow(url, now + BREAKER_MAX_BACKOFF)
+
+    breakers.success(url)
+    assert breakers.allow(url, now)
+    assert breakers.as_dict() == {}
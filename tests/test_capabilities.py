@@ -0,0 +1,71 @@
+"""Tests of the nefiteasy capability discovery."""
+import asyncio
+
+from custom_components.nefiteasy.capabilities import Capabilities, async_probe
+
+TREE = {
+    "/system": ["/system/appliance", "/system/sensors"],
+    "/system/appliance": ["/system/appliance/systemPressure"],
+}
+
+
+async def test_probe():
+    """Test only the directories on the way to the endpoints are walked."""
+    requested = []
+
+    async def get(url):
+        requested.append(url)
+        if url not in TREE:
+            raise asyncio.TimeoutError
+        return [{"id": child} for child in TREE[url]]
+
+    urls = [
+        "/system/appliance/systemPressure",
+        "/system/appliance/actualPower",
+        "/system/sensors/temperatures/outdoor_t1",
+        "/heatingCircuits/hc1/control",
+        "/ecus/rrc/lockuserinterface",
+    ]
+    capabilities = await async_probe(get, "02.01.06", urls)
+
+    assert sorted(requested) == [
+        "/ecus/rrc",
+        "/heatingCircuits",
+        "/system",
+        "/system/appliance",
+        "/system/sensors",
+    ]
+    assert capabilities.has("/system/appliance/systemPressure") is True
+    assert capabilities.has("/system/appliance/actualPower") is False
+    # directories that don't reply are not walked
+    assert capabilities.has("/system/sensors/temperatures/outdoor_t1") is None
+    assert capabilities.has("/heatingCircuits/hc1/control") is None
+    assert capabilities.has("/ecus/rrc/lockuserinterface") is None
+    assert not capabilities.covers(urls)
+    assert capabilities.covers(urls[:2])
+
+    stored = Capabilities.from_dict(capabilities.as_dict())
+    assert stored.firmware == "02.01.06"
+    assert stored.has("/system/appliance/actualPower") is False
+
+
+async def test_probe_circuits():
+    """Test templates are probed for every circuit."""
+    tree = {
+        "/heatingCircuits": ["/heatingCircuits/hc1", "/heatingCircuits/hc2"],
+        "/heatingCircuits/hc1": ["/heatingCircuits/hc1/control"],
+        "/heatingCircuits/hc2": [],
+    }
+
+    async def get(url):
+        return [{"id": child} for child in tree[url]]
+
+    urls = ["/heatingCircuits/{circuit}/control"]
+    capabilities = await async_probe(get, None, urls)
+
+    assert sorted(capabilities.circuits("/heatingCircuits")) == ["hc1", "hc2"]
+    assert capabilities.circuits("/dhwCircuits") is None
+    assert capabilities.has("/heatingCircuits/hc1/control") is True
+    assert capabilities.has("/heatingCircuits/hc2/control") is False
+    assert capabilities.covers(urls)
+    assert not capabilities.covers(["/dhwCircuits/{circuit}/extraDhw/status"])
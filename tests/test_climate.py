@@ -1,4 +1,6 @@
 """Tests of the nefiteasy climate integration."""
+import asyncio
+
 from homeassistant.components.climate import (
     DOMAIN as CLIMATE_DOMAIN,
     SERVICE_SET_PRESET_MODE,
@@ -48,6 +50,43 @@ async def test_climate_set_temperature(hass: HomeAssistant, nefit_wrapper):
     assert thermostat.attributes[ATTR_TEMPERATURE] == 17.0
 
 
+async def test_climate_set_temperature_burst(hass: HomeAssistant, nefit_wrapper):
+    """Test a burst of setpoint changes only writes the first and latest."""
+    client = nefit_wrapper
+
+    written = []
+    set_temperature = client.set_temperature
+
+    def track(temperature):
+        written.append(temperature)
+        set_temperature(temperature)
+
+    client.set_temperature = track
+
+    async def set_temperatures(*temperatures):
+        await asyncio.gather(
+            *(
+                hass.services.async_call(
+                    CLIMATE_DOMAIN,
+                    SERVICE_SET_TEMPERATURE,
+                    {"entity_id": "climate.nefit", ATTR_TEMPERATURE: temperature},
+                    blocking=True,
+                )
+                for temperature in temperatures
+            )
+        )
+
+    # the first write is sent at once, the next ones wait for the settle window
+    await set_temperatures(18.0)
+    await set_temperatures(18.5, 19.0, 19.5)
+    await hass.async_block_till_done()
+
+    assert written == [18.0, 19.5]
+
+    thermostat = hass.states.get("climate.nefit")
+    assert thermostat.attributes[ATTR_TEMPERATURE] == 19.5
+
+
 async def test_climate_set_mode(hass: HomeAssistant, nefit_wrapper):
     """Test setting mode on climate entity."""
     nefit_climate_entity = "climate.nefit"
@@ -0,0 +1,33 @@
+"""Tests of the connections with the Bosch cloud."""
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.nefiteasy.connection import async_get_handshakes
+from custom_components.nefiteasy.const import MAX_HANDSHAKES
+
+
+async def test_handshakes_bounded(hass: HomeAssistant):
+    """Test only a limited number of sessions connect at the same time."""
+    handshakes = async_get_handshakes(hass)
+    assert async_get_handshakes(hass) is handshakes
+
+    active = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def connect():
+        nonlocal active, peak
+        async with handshakes:
+            active += 1
+            peak = max(peak, active)
+            await release.wait()
+            active -= 1
+
+    tasks = [asyncio.create_task(connect()) for _ in range(MAX_HANDSHAKES + 2)]
+    await asyncio.sleep(0)
+    assert peak == MAX_HANDSHAKES
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert active == 0
@@ -0,0 +1,40 @@
+"""Tests of the nefiteasy diagnostics."""
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.nefiteasy.diagnostics import async_get_config_entry_diagnostics
+
+
+async def test_diagnostics(hass: HomeAssistant, nefit_config, nefit_wrapper):
+    """Test diagnostics redact the credentials and report statistics."""
+    result = await async_get_config_entry_diagnostics(hass, nefit_config)
+
+    assert result["entry"]["data"]["serial"] == REDACTED
+    assert result["entry"]["data"]["accesskey"] == REDACTED
+    assert result["entry"]["data"]["password"] == REDACTED
+    assert result["connection"]["state"] == "connection_verified"
+
+    stats = result["stats"]
+    assert stats["timeouts"] == 0
+    assert stats["latency"]["count"] > 0
+    uistatus = stats["endpoints"]["/ecus/rrc/uiStatus"]
+    assert uistatus["requests"] > 0
+    assert sum(uistatus["histogram"].values()) == uistatus["requests"]
+
+    assert result["data"]["inhouse_temperature"] == 17.5
+
+
+async def test_stats_sensors_disabled(hass: HomeAssistant, nefit_wrapper):
+    """Test the statistics sensors are disabled by default."""
+    entity_registry = er.async_get(hass)
+
+    for entity_id in (
+        "sensor.request_latency",
+        "sensor.request_timeouts",
+        "sensor.reconnects",
+        "sensor.update_duration",
+    ):
+        entry = entity_registry.async_get(entity_id)
+        assert entry
+        assert entry.disabled is True
@@ -0,0 +1,147 @@
+"""Tests of the nefiteasy gas usage import."""
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+
+from custom_components.nefiteasy.gas_usage import GasUsageImporter, parse_day
+
+EMPTY = {"d": "255-256-65535", "hw": 0, "ch": 0, "T": 0}
+
+
+def _page(client, page, entries):
+    """Add a page of gas usage entries to the mocked device."""
+    client.data[f"/ecus/rrc/recordings/gasusage?page={page}"] = {
+        "id": "/ecus/rrc/recordings/gasusage",
+        "type": "recordings",
+        "recordable": 0,
+        "writeable": 0,
+        "value": entries + [EMPTY] * (32 - len(entries)),
+    }
+
+
+def _pointer(client, value):
+    """Set the gas usage pointer of the mocked device."""
+    client.data["/ecus/rrc/recordings/gasusagePointer"] = {
+        "id": "/ecus/rrc/recordings/gasusagePointer",
+        "type": "floatValue",
+        "recordable": 0,
+        "writeable": 0,
+        "value": value,
+    }
+
+
+def test_parse_day():
+    """Test parsing the day of an entry."""
+    assert parse_day("01-12-2021").isoformat() == "2021-12-01"
+    assert parse_day("255-256-65535") is None
+    assert parse_day(None) is None
+
+
+async def test_gas_usage_import(
+    hass: HomeAssistant,
+    nefit_config,
+    nefit_wrapper,
+    freezer: FrozenDateTimeFactory,
+):
+    """Test the history is imported once and continued from the checkpoint."""
+    freezer.move_to("2022-01-03 12:00:00")
+    coordinator = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+
+    days = [
+        {"d": f"{day:02d}-12-2021", "hw": 1.0, "ch": 10.0, "T": 50}
+        for day in range(1, 32)
+    ]
+    _page(nefit_wrapper, 1, days)
+    _page(nefit_wrapper, 2, [{"d": "02-01-2022", "hw": 2.0, "ch": 20.0, "T": 40}])
+    _pointer(nefit_wrapper, 34)
+
+    importer = GasUsageImporter(hass, coordinator, "Nefit")
+    with patch(
+        "custom_components.nefiteasy.gas_usage.async_add_external_statistics"
+    ) as add_statistics:
+        await importer.async_import()
+
+    heating = "nefiteasy:123456789_gas_usage_heating"
+    rows = [
+        row
+        for call in add_statistics.call_args_list
+        if call.args[1]["statistic_id"] == heating
+        for row in call.args[2]
+    ]
+    assert len(add_statistics.call_args_list) == 4
+    assert len(rows) == 32
+    assert rows[0]["state"] == 10.0
+    assert rows[-1]["sum"] == 330.0
+    assert add_statistics.call_args_list[-1].args[2][-1]["sum"] == 33.0
+    assert coordinator.get_stored("gas_usage")["page"] == 2
+
+    # the entry of today is imported tomorrow, without reading page 1 again
+    freezer.move_to("2022-01-04 12:00:00")
+    del nefit_wrapper.data["/ecus/rrc/recordings/gasusage?page=1"]
+    _page(
+        nefit_wrapper,
+        2,
+        [
+            {"d": "02-01-2022", "hw": 2.0, "ch": 20.0, "T": 40},
+            {"d": "03-01-2022", "hw": 3.0, "ch": 30.0, "T": 30},
+        ],
+    )
+    _pointer(nefit_wrapper, 35)
+
+    with patch(
+        "custom_components.nefiteasy.gas_usage.async_add_external_statistics"
+    ) as add_statistics:
+        await importer.async_import()
+
+    heating_rows = [
+        call.args[2]
+        for call in add_statistics.call_args_list
+        if call.args[1]["statistic_id"] == heating
+    ]
+    assert len(heating_rows) == 1
+    assert [row["sum"] for row in heating_rows[0]] == [360.0]
+
+
+async def test_gas_usage_import_wrapped(
+    hass: HomeAssistant,
+    nefit_config,
+    nefit_wrapper,
+    freezer: FrozenDateTimeFactory,
+):
+    """Test the import continues after the history wrapped to the first page."""
+    freezer.move_to("2022-01-15 12:00:00")
+    coordinator = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+    coordinator.async_set_stored(
+        "gas_usage",
+        {"page": 3, "day": "2022-01-10", "sum": {"heating": 100.0, "hot_water": 10.0}},
+    )
+
+    def entry(day, month, year):
+        return {"d": f"{day:02d}-{month:02d}-{year}", "hw": 1.0, "ch": 10.0, "T": 50}
+
+    # the days before the wrap, then the oldest days of the buffer
+    _page(nefit_wrapper, 3, [entry(day, 1, 2022) for day in range(1, 13)])
+    _page(nefit_wrapper, 4, [entry(day, 6, 2021) for day in range(1, 33)])
+    _page(nefit_wrapper, 1, [entry(13, 1, 2022), entry(14, 1, 2022)])
+    _pointer(nefit_wrapper, 3)
+
+    importer = GasUsageImporter(hass, coordinator, "Nefit")
+    with patch(
+        "custom_components.nefiteasy.gas_usage.async_add_external_statistics"
+    ) as add_statistics:
+        await importer.async_import()
+
+    heating = "nefiteasy:123456789_gas_usage_heating"
+    rows = [
+        row
+        for call in add_statistics.call_args_list
+        if call.args[1]["statistic_id"] == heating
+        for row in call.args[2]
+    ]
+    assert [row["sum"] for row in rows] == [110.0, 120.0, 130.0, 140.0]
+    assert coordinator.get_stored("gas_usage") == {
+        "page": 1,
+        "day": "2022-01-14",
+        "sum": {"heating": 140.0, "hot_water": 14.0},
+    }
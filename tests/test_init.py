@@ -1,10 +1,38 @@
 """Tests of the initialization of the nefiteasy integration."""
 import asyncio
+from datetime import timedelta
+from typing import Any
 from unittest.mock import patch
 
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+import slixmpp
+
+from custom_components.nefiteasy import NefitEasy
+from custom_components.nefiteasy.const import (
+    BREAKER_THRESHOLD,
+    CONF_MAX_IN_FLIGHT,
+    DEFAULT_MAX_IN_FLIGHT,
+    FIRMWARE_URL,
+    PRESENCE_URL,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+    SENSORS,
+    STATE_CONNECTION_VERIFIED,
+    STATE_ERROR_AUTH,
+    STATE_INIT,
+    UPDATE_INTERVAL_ACTIVE,
+    UPDATE_INTERVAL_IDLE,
+)
+from custom_components.nefiteasy.models import NefitPriority
 
 from .conftest import ClientMock
 
@@ -80,3 +108,516 @@ async def test_setup_validation_fail_timeout(mock_class, hass: HomeAssistant):
     await hass.async_block_till_done()
 
     assert config_entry.state == config_entries.ConfigEntryState.SETUP_RETRY
+
+
+@pytest.mark.parametrize(
+    ("options", "window"),
+    [({}, DEFAULT_MAX_IN_FLIGHT), ({CONF_MAX_IN_FLIGHT: 2}, 2)],
+)
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_refresh_requests_pipelined(
+    mock_class,
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    options: dict[str, Any],
+    window: int,
+):
+    """Test that a refresh sends its requests concurrently within the window."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data, options=options)
+
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+
+    outstanding: list[str] = []
+    peak = 0
+
+    def get(path):
+        nonlocal peak
+        outstanding.append(path)
+        peak = max(peak, len(outstanding))
+
+    client.get = get
+
+    freezer.tick(timedelta(seconds=65))
+    task = hass.async_create_task(coordinator.async_refresh())
+    while not task.done():
+        await asyncio.sleep(0)
+        if outstanding:
+            await client.callback(client.data[outstanding.pop(0)])
+
+    assert peak == window
+    assert coordinator.last_update_success
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_readback_preempts_refresh(
+    mock_class, hass: HomeAssistant, freezer: FrozenDateTimeFactory
+):
+    """Test that a read-back of a write is sent before the queued polls."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+
+    sent: list[str] = []
+    client.get = sent.append
+
+    freezer.tick(timedelta(seconds=65))
+    refresh = hass.async_create_task(coordinator.async_refresh())
+    while len(sent) < DEFAULT_MAX_IN_FLIGHT:
+        await asyncio.sleep(0)
+
+    url = "/heatingCircuits/hc1/holidayMode/status"
+    readback = hass.async_create_task(
+        coordinator._async_get_url(url, fresh=True, priority=NefitPriority.INTERACTIVE)
+    )
+    await asyncio.sleep(0)
+    assert url not in sent
+
+    # the read-back gets the first free slot
+    await client.callback(client.data[sent[0]])
+    while len(sent) == DEFAULT_MAX_IN_FLIGHT:
+        await asyncio.sleep(0)
+    assert sent[DEFAULT_MAX_IN_FLIGHT] == url
+
+    replied = 1
+    while not (refresh.done() and readback.done()):
+        await asyncio.sleep(0)
+        if replied < len(sent):
+            await client.callback(client.data[sent[replied]])
+            replied += 1
+
+    assert await readback == "off"
+    assert coordinator.last_update_success
+    assert coordinator.stats.queue_wait[NefitPriority.BACKGROUND].count > 0
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_unsupported_endpoint_skipped(
+    mock_class, hass: HomeAssistant, hass_storage: dict[str, Any]
+):
+    """Test that an endpoint that never replies is not requested anymore."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+    url = "/system/appliance/systemPressure"
+
+    client.failing.add(url)
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+    for _ in range(BREAKER_THRESHOLD - 1):
+        assert url not in coordinator.unsupported
+        await coordinator.async_refresh()
+
+    assert coordinator.unsupported == {url}
+    assert client.requested.count(url) == BREAKER_THRESHOLD
+
+    await coordinator.async_refresh()
+    assert client.requested.count(url) == BREAKER_THRESHOLD
+    assert coordinator.last_update_success
+
+    await coordinator.async_save_data()
+    stored = hass_storage["nefiteasy.123456789"]["data"]
+    assert stored["unsupported"] == [url]
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_capabilities_discovered(
+    mock_class, hass: HomeAssistant, hass_storage: dict[str, Any]
+):
+    """Test that only entities of endpoints the device has are created."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    unique_id = "123456789_temperature_adjustment"
+    assert entity_registry.async_get_entity_id("number", "nefiteasy", unique_id) is None
+    assert entity_registry.async_get_entity_id(
+        "number", "nefiteasy", "123456789_shower_timer_duration"
+    )
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+    await coordinator.async_save_data()
+    stored = hass_storage["nefiteasy.123456789"]["data"]["capabilities"]
+    assert stored["firmware"] == "02.01.06"
+    assert "/heatingCircuits/hc1" in stored["walked"]
+
+    client.requested.clear()
+
+    # the endpoints are kept for the same firmware
+    await coordinator.async_discover_capabilities()
+    assert client.requested == [FIRMWARE_URL]
+
+    # a firmware update that adds an endpoint adds its entity
+    url = "/heatingCircuits/hc1/temperatureAdjustment"
+    client.data[FIRMWARE_URL]["value"] = "02.01.07"
+    client.data["/heatingCircuits/hc1"]["references"].append({"id": url})
+    client.data[url] = {"id": url, "type": "floatValue", "value": 0.5}
+    await coordinator.async_discover_capabilities()
+    await hass.async_block_till_done()
+
+    assert coordinator.firmware == "02.01.07"
+    assert entity_registry.async_get_entity_id("number", "nefiteasy", unique_id)
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_overlapping_requests_share_reply(mock_class, hass: HomeAssistant):
+    """Test that identical in-flight requests share one round trip."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+
+    url = "/system/appliance/systemPressure"
+    sent: list[str] = []
+    client.get = sent.append
+
+    first = hass.async_create_task(coordinator._async_get_url(url))
+    second = hass.async_create_task(coordinator._async_get_url(url))
+    fresh = hass.async_create_task(coordinator._async_get_url(url, fresh=True))
+    await asyncio.sleep(0)
+
+    assert sent == [url, url]
+
+    await client.callback({"id": url, "value": 1.5})
+
+    assert await first == 1.5
+    assert await second == 1.5
+    assert not fresh.done()
+
+    await client.callback({"id": url, "value": 1.6})
+
+    assert await fresh == 1.6
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_late_reply_not_taken_for_new_request(mock_class, hass: HomeAssistant):
+    """Test that the late reply of a request that timed out is counted as late."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+
+    url = "/system/appliance/systemPressure"
+    sent: list[str] = []
+    client.get = sent.append
+
+    with pytest.raises(asyncio.TimeoutError):
+        await coordinator._async_get_url(url, timeout=0)
+
+    second = hass.async_create_task(coordinator._async_get_url(url))
+    await asyncio.sleep(0)
+    assert sent == [url, url]
+
+    await client.callback({"id": url, "value": 1.4})
+    assert not second.done()
+    assert coordinator.stats.late_replies == 1
+
+    await client.callback({"id": url, "value": 1.6})
+    assert await second == 1.6
+    assert coordinator.stats.late_replies == 1
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_refresh_schedule(
+    mock_class, hass: HomeAssistant, freezer: FrozenDateTimeFactory
+):
+    """Test that only endpoints that are due are refreshed."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+
+    # boiler indicator of the fixture is CH
+    assert coordinator.update_interval == UPDATE_INTERVAL_ACTIVE
+
+    client.requested.clear()
+
+    freezer.tick(timedelta(seconds=35))
+    await coordinator.async_refresh()
+
+    assert "/ecus/rrc/uiStatus" in client.requested
+    assert "/heatingCircuits/hc1/actualSupplyTemperature" in client.requested
+    assert "/system/appliance/systemPressure" not in client.requested
+    assert "/ecus/rrc/recordings/yearTotal" not in client.requested
+
+    client.requested.clear()
+    client.data["/ecus/rrc/uiStatus"]["value"]["BAI"] = "No"
+    freezer.tick(timedelta(seconds=35))
+    await coordinator.async_refresh()
+
+    assert "/system/appliance/systemPressure" in client.requested
+    assert "/ecus/rrc/recordings/yearTotal" not in client.requested
+    assert coordinator.update_interval == UPDATE_INTERVAL_IDLE
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_warm_start_cache(
+    mock_class, hass: HomeAssistant, hass_storage: dict[str, Any]
+):
+    """Test that the last known state is restored until it is refreshed."""
+    hass_storage["nefiteasy.123456789"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": "nefiteasy.123456789",
+        "data": {
+            "data": {"year_total": 9000, "system_pressure": 1.2},
+            "data_time": "2021-12-28T21:40:00+00:00",
+        },
+    }
+
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    coordinator = NefitEasy(hass, entry_data)
+    await coordinator.async_load()
+    coordinator.connected_state = STATE_CONNECTION_VERIFIED
+    await coordinator.add_key(SENSORS[0])
+
+    assert coordinator.data["year_total"] == 9000
+    assert coordinator.cached_at(["year_total"]) == "2021-12-28T21:40:00+00:00"
+
+    await coordinator.parse_message(
+        {"id": "/ecus/rrc/recordings/yearTotal", "value": 9000}
+    )
+
+    assert coordinator.cached_at(["year_total"]) is None
+    assert coordinator.cached_at(["system_pressure"]) is not None
+
+    coordinator._updated_at = dt_util.utcnow()
+    await coordinator.async_save_data()
+
+    stored = hass_storage["nefiteasy.123456789"]["data"]["data"]
+    assert stored["year_total"] == 9000
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_presence_not_connected(
+    mock_class, hass: HomeAssistant, hass_storage: dict[str, Any]
+):
+    """Test that a profile probed while disconnected keeps the stored name."""
+    hass_storage["nefiteasy.123456789"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": "nefiteasy.123456789",
+        "data": {"presence": {"1": "my_device"}},
+    }
+
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    coordinator = NefitEasy(hass, entry_data)
+    await coordinator.async_load()
+
+    async def init_presence(endpoint: str, index: int) -> Any:
+        raise slixmpp.xmlstream.xmlstream.NotConnectedError
+
+    with patch.object(coordinator, "async_init_presence", init_presence):
+        profiles = await coordinator.async_discover_presence(PRESENCE_URL)
+
+    assert profiles == {1: "my_device"}
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_setup_warm_start(
+    mock_class, hass: HomeAssistant, hass_storage: dict[str, Any]
+):
+    """Test setup with restored state does not wait for the connection."""
+    hass_storage["nefiteasy.123456789"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": "nefiteasy.123456789",
+        "data": {
+            "data": {"system_pressure": 1.2},
+            "data_time": "2021-12-28T21:40:00+00:00",
+        },
+    }
+
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+
+    async def wait():
+        raise asyncio.TimeoutError
+
+    client.xmppclient.connected_event.wait = wait
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state == config_entries.ConfigEntryState.LOADED
+
+    state = hass.states.get("sensor.system_pressure")
+    assert state
+    assert state.state == "1.2"
+    assert state.attributes["cached_at"] == "2021-12-28T21:40:00+00:00"
+
+    coordinator = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+    assert coordinator.stats.reconnects == 0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_reconnect_on_session_end(mock_class, hass: HomeAssistant):
+    """Test an unexpected session end reconnects right away."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    nefit = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+    assert nefit.connected_state == STATE_CONNECTION_VERIFIED
+
+    connects = 0
+    connect = client.connect
+
+    async def count_connect():
+        nonlocal connects
+        connects += 1
+        await connect()
+
+    client.connect = count_connect
+
+    await nefit.session_end_callback()
+    assert nefit.connected_state == STATE_INIT
+
+    await asyncio.wait_for(nefit.async_wait_verified(), timeout=1)
+    await hass.async_block_till_done()
+
+    assert connects == 1
+    assert nefit.connected_state == STATE_CONNECTION_VERIFIED
+    assert nefit.stats.reconnects == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_no_reconnect_after_auth_failure(mock_class, hass: HomeAssistant):
+    """Test polls after an authentication failure don't connect again."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    config_entry = MockConfigEntry(domain="nefiteasy", data=entry_data)
+
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    nefit = hass.data["nefiteasy"][config_entry.entry_id]["client"]
+    with patch.object(config_entry, "async_start_reauth"):
+        await nefit.failed_auth_handler("auth_error_password")
+
+    connects = 0
+    connect = client.connect
+
+    async def count_connect():
+        nonlocal connects
+        connects += 1
+        await connect()
+
+    client.connect = count_connect
+
+    await nefit.async_refresh()
+    await hass.async_block_till_done()
+
+    assert connects == 0
+    assert nefit.connected_state == STATE_ERROR_AUTH
+    assert not nefit.last_update_success
+
+
+def test_reconnect_delay():
+    """Test the backoff of reconnect attempts is capped and jittered."""
+    for attempt in range(12):
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2**attempt)
+        for _ in range(20):
+            assert delay / 2 <= NefitEasy._reconnect_delay(attempt) <= delay
+
+    delays = {NefitEasy._reconnect_delay(20) for _ in range(20)}
+    assert max(delays) <= RECONNECT_MAX_DELAY
+    assert len(delays) > 1
+
+
+async def test_refresh_later_merged(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, nefit_wrapper, nefit_config
+):
+    """Test delayed refreshes of an endpoint are merged into the earliest."""
+    client = nefit_wrapper
+    nefit = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+
+    client.requested.clear()
+
+    nefit.async_refresh_later("/ecus/rrc/uiStatus", 5)
+    nefit.async_refresh_later("/ecus/rrc/uiStatus", 2)
+    nefit.async_refresh_later("/ecus/rrc/uiStatus", 8)
+
+    freezer.tick(timedelta(seconds=3))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert client.requested == ["/ecus/rrc/uiStatus"]
+
+    freezer.tick(timedelta(seconds=10))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert client.requested == ["/ecus/rrc/uiStatus"]
+
+    # pending refreshes are cancelled on unload
+    nefit.async_refresh_later("/ecus/rrc/uiStatus", 5)
+    assert await hass.config_entries.async_unload(nefit_config.entry_id)
+    await hass.async_block_till_done()
+
+    freezer.tick(timedelta(seconds=10))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert client.requested == ["/ecus/rrc/uiStatus"]
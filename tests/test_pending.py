@@ -0,0 +1,66 @@
+"""Tests of the nefiteasy pending request registry."""
+import asyncio
+
+from custom_components.nefiteasy.pending import PendingRequests
+
+
+async def test_late_reply_after_last_waiter():
+    """Test a late reply is not taken for a request sent after it."""
+    pending = PendingRequests()
+    url = "/ecus/rrc/uiStatus"
+
+    future, send = pending.add(url)
+    assert send
+    future.cancel()  # timed out
+    pending.discard(url, future)
+
+    future, send = pending.add(url)
+    assert send
+
+    # the reply of the request given up
+    assert pending.late(url)
+    assert not future.done()
+
+    assert not pending.late(url)
+    assert pending.resolve(url, "fresh")
+    assert future.result() == "fresh"
+    pending.discard(url, future)
+
+    # a later push is not taken for a late reply
+    assert not pending.late(url)
+    assert not pending.resolve(url, "pushed")
+
+
+async def test_late_reply_with_waiters():
+    """Test a late reply does not wake a fresh request waiting after it."""
+    pending = PendingRequests()
+    url = "/heatingCircuits/hc1/holidayMode/status"
+
+    first, _ = pending.add(url)
+    second, send = pending.add(url, fresh=True)
+    assert send
+    first.cancel()
+    pending.discard(url, first)
+
+    assert pending.late(url)
+    assert not second.done()
+
+    assert not pending.late(url)
+    assert pending.resolve(url, "on")
+    assert await asyncio.wait_for(second, 1) == "on"
+
+
+async def test_unsent_request():
+    """Test a request that could not be sent expects no late reply."""
+    pending = PendingRequests()
+    url = "/system/appliance/systemPressure"
+
+    future, send = pending.add(url)
+    assert send
+    pending.discard(url, future, sent=False)
+
+    future, send = pending.add(url)
+    assert send
+    assert not pending.late(url)
+    assert pending.resolve(url, 1.5)
+    assert future.result() == 1.5
@@ -0,0 +1,44 @@
+"""Tests of the nefiteasy request scheduler."""
+import asyncio
+
+from custom_components.nefiteasy.models import NefitPriority
+from custom_components.nefiteasy.scheduler import RequestScheduler
+
+
+async def test_scheduler_priority():
+    """Test queued requests get a slot by priority, then in order."""
+    scheduler = RequestScheduler(1)
+    await scheduler.acquire(NefitPriority.BACKGROUND)
+
+    order = []
+
+    async def request(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+        scheduler.release()
+
+    tasks = [
+        asyncio.create_task(request(name, priority))
+        for name, priority in (
+            ("poll", NefitPriority.BACKGROUND),
+            ("cancelled", NefitPriority.INTERACTIVE),
+            ("next poll", NefitPriority.BACKGROUND),
+            ("presence", NefitPriority.NORMAL),
+            ("write", NefitPriority.INTERACTIVE),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queued == 5
+
+    tasks[1].cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queued == 4
+
+    scheduler.release()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert order == ["write", "presence", "poll", "next poll"]
+    assert scheduler.queued == 0
+
+    # all slots are free again
+    await asyncio.wait_for(scheduler.acquire(NefitPriority.BACKGROUND), 1)
@@ -1,11 +1,17 @@
 """Tests of the nefiteasy sensor integration."""
 from datetime import timedelta
+from unittest.mock import patch
 
 from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import STATE_UNAVAILABLE
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
 from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
+from custom_components.nefiteasy.sensor import NefitSensor
+
+from .conftest import ClientMock
+
 
 async def test_disabled_sensor_default(hass: HomeAssistant, nefit_wrapper):
     """Test disabled state of entity."""
@@ -32,6 +38,10 @@ async def test_sensor_states(
     assert state
     assert state.state == "1227.1"
 
+    state = hass.states.get("sensor.year_total_energy")
+    assert state
+    assert state.state == "9970.3"
+
     state = hass.states.get("sensor.status")
     assert state
     assert state.state == "0E: system waiting"
@@ -71,3 +81,135 @@ async def test_sensor_states_disabled(
     state = hass.states.get("sensor.nefiteasy_123456789_inhouse_temperature")
     assert state
     assert state.state == "17.5"
+
+
+async def test_sensor_push_updates(hass: HomeAssistant, nefit_wrapper):
+    """Test that pushed messages only update entities whose data changed."""
+    client = nefit_wrapper
+    url = "/system/appliance/systemPressure"
+
+    with patch.object(NefitSensor, "async_write_ha_state") as write_state:
+        await client.callback({"id": url, "value": 1.5})
+        assert write_state.call_count == 0
+
+        await client.callback({"id": url, "value": 1.8})
+        assert write_state.call_count == 1
+
+        # a burst of pushes is coalesced into a single update
+        await client.callback({"id": url, "value": 1.9})
+        await client.callback({"id": url, "value": 2.0})
+        assert write_state.call_count == 1
+
+
+async def test_sensor_fuel_options(hass: HomeAssistant, nefit_config, nefit_wrapper):
+    """Test the volume of gas follows the fuel set in the options."""
+    result = await hass.config_entries.options.async_init(nefit_config.entry_id)
+    assert result["type"] == "form"
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"fuel_type": "lpg"}
+    )
+    assert result["type"] == "create_entry"
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.year_total")
+    assert state
+    assert state.state == "406.2"
+
+    result = await hass.config_entries.options.async_init(nefit_config.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"fuel_type": "natural_gas", "calorific_value": 9.77}
+    )
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.year_total")
+    assert state
+    assert state.state == "1020.5"
+
+    state = hass.states.get("sensor.year_total_energy")
+    assert state
+    assert state.state == "9970.3"
+
+
+async def test_sensor_malformed_value(hass: HomeAssistant, nefit_config, nefit_wrapper):
+    """Test a malformed value is dropped and counted."""
+    client = nefit_wrapper
+    coordinator = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+    url = "/heatingCircuits/hc1/actualSupplyTemperature"
+
+    await client.callback({"id": url, "value": "29.14"})
+    await client.callback({"id": url, "value": "n/a"})
+
+    assert coordinator.data["supply_temperature"] == 29.1
+    assert coordinator.stats.malformed == 1
+
+
+async def test_sensor_endpoint_failure(
+    hass: HomeAssistant, nefit_config, nefit_wrapper
+):
+    """Test a failing endpoint only makes its own entities unavailable."""
+    client = nefit_wrapper
+    coordinator = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+    url = "/system/appliance/systemPressure"
+
+    client.failing.add(url)
+    coordinator._fetched.clear()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert url not in coordinator.last_success
+    assert hass.states.get("sensor.system_pressure").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.supply_temperature").state == "29.1"
+
+    client.failing.clear()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert url in coordinator.last_success
+    assert hass.states.get("sensor.system_pressure").state == "1.5"
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_sensor_heating_circuits(
+    mock_class, hass: HomeAssistant, freezer: FrozenDateTimeFactory, nefit_config
+):
+    """Test the sensors of every heating circuit are refreshed together."""
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    url = "/heatingCircuits/hc2/actualSupplyTemperature"
+    client.data["/heatingCircuits"]["references"].append({"id": "/heatingCircuits/hc2"})
+    client.data["/heatingCircuits/hc2"] = {
+        "id": "/heatingCircuits/hc2",
+        "type": "refEnum",
+        "references": [{"id": url}],
+    }
+    client.data[url] = {"id": url, "type": "floatValue", "value": 35.5}
+
+    await hass.config_entries.async_setup(nefit_config.entry_id)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.supply_temperature_hc2")
+    assert state
+    assert state.state == "35.5"
+    assert hass.states.get("sensor.supply_temperature")
+
+    # hc2 has no holiday mode
+    entity_registry = er.async_get(hass)
+    assert entity_registry.async_get_entity_id(
+        "switch", "nefiteasy", "123456789_holiday_mode"
+    )
+    assert not entity_registry.async_get_entity_id(
+        "switch", "nefiteasy", "123456789_holiday_mode_hc2"
+    )
+
+    client.requested.clear()
+
+    coordinator = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+    freezer.tick(timedelta(seconds=35))
+    await coordinator.async_refresh()
+
+    assert "/heatingCircuits/hc1/actualSupplyTemperature" in client.requested
+    assert url in client.requested
@@ -0,0 +1,42 @@
+"""Tests of the nefiteasy state store."""
+from custom_components.nefiteasy.store import StateStore
+
+
+def test_store_versions():
+    """Test the keys changed since a version are found."""
+    store = StateStore()
+    pressure = store.index("system_pressure")
+    power = store.index("actual_power")
+    assert store.index("system_pressure") == pressure
+    assert len(store) == 0
+    assert store.get("system_pressure") is None
+
+    assert store.set(pressure, 1.5)
+    assert store.set(power, 10)
+    version = store.version
+    assert not store.set(pressure, 1.5)
+    assert store.version == version
+    assert store.changed_since(version) == frozenset()
+
+    assert store.set(pressure, 1.8)
+    assert store.changed_since(version) == {"system_pressure"}
+    assert store.changed_since(0) == {"system_pressure", "actual_power"}
+    assert dict(store) == {"system_pressure": 1.8, "actual_power": 10}
+    assert store.entry("system_pressure").received is not None
+
+
+def test_store_restore():
+    """Test restored values count as changed when they are received."""
+    store = StateStore()
+    store.restore({"system_pressure": 1.5, "actual_power": 10})
+    version = store.version
+    assert store.restored()
+    assert store.restored(["system_pressure"])
+    assert not store.restored(["year_total"])
+
+    assert store.set(store.index("system_pressure"), 1.5)
+    assert store.changed_since(version) == {"system_pressure"}
+    assert not store.restored(["system_pressure"])
+    assert store.restored()
+
+    assert store.as_dict() == {"system_pressure": 1.5, "actual_power": 10}
@@ -1,5 +1,8 @@
 """Tests of the nefiteasy sensor integration."""
+import asyncio
 from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
 
 from freezegun.api import FrozenDateTimeFactory
 from homeassistant.components.switch import (
@@ -9,8 +12,16 @@ from homeassistant.components.switch import (
 )
 from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity_registry as er
-from pytest_homeassistant_custom_component.common import async_fire_time_changed
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+import slixmpp
+
+from .conftest import ClientMock
 
 
 async def test_disabled_switch_default(hass: HomeAssistant, nefit_wrapper):
@@ -131,6 +142,140 @@ async def test_switch_turn_on_off(
     assert state.state == "off"
 
 
+async def test_switch_read_from_ui_status(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    nefit_switch_wrapper,
+    nefit_wrapper,
+):
+    """Test switches carried by uiStatus are not read on their own."""
+    client = nefit_wrapper
+
+    client.requested.clear()
+
+    client.data["/ecus/rrc/uiStatus"]["value"]["HMD"] = "on"
+    del client.data["/ecus/rrc/uiStatus"]["value"]["FPA"]
+
+    freezer.tick(timedelta(minutes=15))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    state = hass.states.get("switch.nefiteasy_123456789_holiday_mode")
+    assert state
+    assert state.state == "on"
+
+    assert "/ecus/rrc/uiStatus" in client.requested
+    assert "/heatingCircuits/hc1/holidayMode/status" not in client.requested
+    assert "/ecus/rrc/dayassunday/day10/active" not in client.requested
+    # read on its own from the next update, since uiStatus does not have it
+    assert "/ecus/rrc/userprogram/fireplacefunction" not in client.requested
+
+    client.requested.clear()
+    freezer.tick(timedelta(minutes=15))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert "/ecus/rrc/userprogram/fireplacefunction" in client.requested
+
+    state = hass.states.get("switch.nefiteasy_123456789_fireplace_mode")
+    assert state
+    assert state.state == "off"
+
+
+async def test_hot_water_turn_off(
+    hass: HomeAssistant, nefit_switch_wrapper, nefit_wrapper
+):
+    """Test a write of hot water is confirmed by its read-back."""
+    client = nefit_wrapper
+    # the endpoint follows the user mode, which is clock in the fixture
+    url = "/dhwCircuits/dhwA/dhwOperationClockMode"
+    client.data[url] = {
+        "id": url,
+        "type": "stringValue",
+        "recordable": 0,
+        "writeable": 1,
+        "value": "on",
+    }
+
+    await hass.services.async_call(
+        SWITCH_DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: "switch.nefiteasy_123456789_hot_water"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert client.data[url]["value"] == "off"
+    state = hass.states.get("switch.nefiteasy_123456789_hot_water")
+    assert state
+    assert state.state == "off"
+
+
+async def test_switch_write_failed(
+    hass: HomeAssistant, nefit_switch_wrapper, nefit_wrapper
+):
+    """Test a failed write is rolled back."""
+    client = nefit_wrapper
+
+    def put_value(path, value):
+        raise slixmpp.xmlstream.xmlstream.NotConnectedError
+
+    states = []
+
+    def track(event):
+        states.append(event.data["new_state"].state)
+
+    hass.bus.async_listen("state_changed", track)
+
+    with patch.object(client, "put_value", put_value), pytest.raises(
+        HomeAssistantError
+    ):
+        await hass.services.async_call(
+            SWITCH_DOMAIN,
+            SERVICE_TURN_ON,
+            {ATTR_ENTITY_ID: "switch.nefiteasy_123456789_holiday_mode"},
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+
+    # the new state was shown at once and rolled back
+    assert states == ["on", "off"]
+
+    state = hass.states.get("switch.nefiteasy_123456789_holiday_mode")
+    assert state
+    assert state.state == "off"
+
+
+async def test_switch_write_unloaded(
+    hass: HomeAssistant, nefit_config, nefit_switch_wrapper, nefit_wrapper
+):
+    """Test a write that is not confirmed before an unload is cancelled."""
+    client = nefit_wrapper
+    nefit = hass.data["nefiteasy"][nefit_config.entry_id]["client"]
+    url = "/heatingCircuits/hc1/holidayMode/status"
+
+    sent = []
+    client.get = sent.append
+
+    task = hass.async_create_task(
+        hass.services.async_call(
+            SWITCH_DOMAIN,
+            SERVICE_TURN_ON,
+            {ATTR_ENTITY_ID: "switch.nefiteasy_123456789_holiday_mode"},
+            blocking=True,
+        )
+    )
+    while url not in sent:
+        await asyncio.sleep(0)
+
+    assert await hass.config_entries.async_unload(nefit_config.entry_id)
+    await hass.async_block_till_done()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not nefit._refresh_timers
+
+
 async def test_presence_detection(
     hass: HomeAssistant,
     freezer: FrozenDateTimeFactory,
@@ -145,6 +290,10 @@ async def test_presence_detection(
     entry = entity_registry.async_get("switch.presence_my_device")
     assert entry
 
+    state = hass.states.get("switch.presence_my_device")
+    assert state
+    assert state.state == "on"
+
     freezer.tick(timedelta(seconds=65))
     async_fire_time_changed(hass)
     await hass.async_block_till_done(wait_background_tasks=True)
@@ -164,3 +313,42 @@ async def test_presence_detection(
     state = hass.states.get("switch.presence_my_device")
     assert state
     assert state.state == "off"
+
+
+@patch("custom_components.nefiteasy.NefitCore")
+async def test_presence_detection_restored(
+    mock_class,
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    nefit_config: MockConfigEntry,
+):
+    """Test that presence profiles found before are restored."""
+    hass_storage["nefiteasy.123456789"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": "nefiteasy.123456789",
+        "data": {"presence": {"1": "my_device"}},
+    }
+
+    client = ClientMock(mock_class)
+    mock_class.return_value = client
+
+    client.data["/ecus/rrc/homeentrancedetection/userprofile1/detected"] = {
+        "id": "/ecus/rrc/homeentrancedetection/userprofile1/detected",
+        "type": "stringValue",
+        "recordable": 0,
+        "writeable": 1,
+        "value": "on",
+    }
+
+    await hass.config_entries.async_setup(nefit_config.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+
+    entry = entity_registry.async_get("switch.presence_my_device")
+    assert entry
+
+    state = hass.states.get("switch.presence_my_device")
+    assert state
+    assert state.state == "on"